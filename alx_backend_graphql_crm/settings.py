@@ -49,7 +49,7 @@ ROOT_URLCONF = 'alx_backend_graphql_crm.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.Django',
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
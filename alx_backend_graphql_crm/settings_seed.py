@@ -0,0 +1,34 @@
+"""
+Django settings for running seed_db.py.
+
+Loads only the apps the seeder touches, so startup skips the admin,
+GraphQL and static file apps.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'crm',
+]
+
+LOGGING = {}
+
+# Keep the connection open between runs in one process (e.g. tests calling
+# main() repeatedly). On PostgreSQL with psycopg 3 and psycopg_pool installed
+# the connection pool does this instead; Django rejects CONN_MAX_AGE together
+# with a pool, and the pool is unavailable under psycopg2.
+try:
+    import psycopg  # noqa: F401
+    import psycopg_pool  # noqa: F401
+except ImportError:
+    HAS_PSYCOPG_POOL = False
+else:
+    HAS_PSYCOPG_POOL = True
+
+DATABASES = {'default': {**DATABASES['default'], 'CONN_HEALTH_CHECKS': True}}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql' and HAS_PSYCOPG_POOL:
+    DATABASES['default']['OPTIONS'] = {**DATABASES['default'].get('OPTIONS', {}), 'pool': True}
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
@@ -1,36 +1,130 @@
 import django_filters
 from django_filters import FilterSet
-from .models import Customer, Product, Order
-import re
+from django_filters.constants import EMPTY_VALUES
+from decimal import Decimal
+from django.db.models import (
+    Count, DecimalField, Exists, IntegerField, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce
+from .models import Customer, Product, Order, STATUS_CHOICES
 
-class CustomerFilter(django_filters.FilterSet):
+def order_has_product_named(value):
+    """EXISTS subquery matching orders that contain a product by name.
+
+    A semi-join on the through table avoids the duplicate rows (and the
+    DISTINCT needed to remove them) that joining products__name produces.
+    """
+    return Exists(
+        Order.products.through.objects.filter(
+            order_id=OuterRef('pk'),
+            product__name__icontains=value,
+        )
+    )
+
+
+def _aggregate_subquery(queryset, key, aggregate, output_field, default):
+    """Correlated aggregate of queryset rows grouped by key, default when none match.
+
+    Unlike aggregating over a join this keeps one row per outer object, so no
+    GROUP BY over every selected column is needed.
+    """
+    values = queryset.order_by().values(key).annotate(v=aggregate).values('v')
+    return Coalesce(Subquery(values, output_field=output_field), default, output_field=output_field)
+
+
+def _count_subquery(queryset, key):
+    """Correlated COUNT(*) of queryset rows grouped by key, 0 when none match."""
+    return _aggregate_subquery(queryset, key, Count('*'), IntegerField(), Value(0))
+
+
+def annotate_order_count(queryset):
+    """Annotate customers with order_count, reusing an existing annotation.
+
+    Supplying both the gte and lte bounds would otherwise add the count
+    twice to the same query.
+    """
+    if 'order_count' not in queryset.query.annotations:
+        orders = Order.objects.filter(customer=OuterRef('pk'))
+        queryset = queryset.annotate(order_count=_count_subquery(orders, 'customer'))
+    return queryset
+
+
+def annotate_total_spent(queryset):
+    """Annotate customers with total_spent, reusing an existing annotation."""
+    if 'total_spent' not in queryset.query.annotations:
+        orders = Order.objects.filter(customer=OuterRef('pk'))
+        total = _aggregate_subquery(
+            orders, 'customer', Sum('total_amount'),
+            DecimalField(max_digits=12, decimal_places=2), Value(Decimal('0')),
+        )
+        queryset = queryset.annotate(total_spent=total)
+    return queryset
+
+
+def annotate_product_count(queryset):
+    """Annotate orders with product_count, reusing an existing annotation."""
+    if 'product_count' not in queryset.query.annotations:
+        links = Order.products.through.objects.filter(order_id=OuterRef('pk'))
+        queryset = queryset.annotate(product_count=_count_subquery(links, 'order_id'))
+    return queryset
+
+
+CONTAINS_HELP = (
+    "Case-insensitive substring match. Prefer the *_istartswith filter "
+    "where possible: prefix matches are indexed on PostgreSQL and SQLite, "
+    "substring matches only on PostgreSQL (trigram)."
+)
+
+class CRMFilterSet(FilterSet):
+    """FilterSet that leaves the queryset untouched when no filter is set."""
+    
+    def filter_queryset(self, queryset):
+        if all(value in EMPTY_VALUES for value in self.form.cleaned_data.values()):
+            return queryset
+        return super().filter_queryset(queryset)
+
+
+class CustomerFilter(CRMFilterSet):
     """Filter for Customer model."""
     
-    name = django_filters.CharFilter(lookup_expr='icontains')
-    email = django_filters.CharFilter(lookup_expr='icontains')
-    phone = django_filters.CharFilter(lookup_expr='icontains')
+    # Prefix matches use the case-insensitive indexes from migration 0005
+    name_istartswith = django_filters.CharFilter(field_name='name', lookup_expr='istartswith')
+    email_istartswith = django_filters.CharFilter(field_name='email', lookup_expr='istartswith')
+    
+    # Substring matches only use an index on PostgreSQL (trigram, see migrations 0002/0003)
+    name = django_filters.CharFilter(lookup_expr='icontains', help_text=CONTAINS_HELP)
+    email = django_filters.CharFilter(lookup_expr='icontains', help_text=CONTAINS_HELP)
+    phone = django_filters.CharFilter(lookup_expr='icontains', help_text=CONTAINS_HELP)
     
     created_at_gte = django_filters.DateFilter(field_name='created_at', lookup_expr='gte')
     created_at_lte = django_filters.DateFilter(field_name='created_at', lookup_expr='lte')
     
+    # Prefix match served by the phone index from migration 0006
     phone_pattern = django_filters.CharFilter(method='filter_phone_pattern')
     
+    order_count_gte = django_filters.NumberFilter(method='filter_by_order_count')
+    order_count_lte = django_filters.NumberFilter(method='filter_by_order_count')
+    
     def filter_phone_pattern(self, queryset, name, value):
-        """Custom filter for phone number pattern."""
-        if value:
-            pattern = re.escape(value)
-            return queryset.filter(phone__regex=f'^{pattern}')
-        return queryset
+        """Custom filter for phone number prefix (e.g. '+1')."""
+        return queryset.filter(phone__startswith=value) if value else queryset
+    
+    def filter_by_order_count(self, queryset, name, value):
+        """Custom filter for customers by number of orders."""
+        lookup = name.rsplit('_', 1)[1]
+        return annotate_order_count(queryset).filter(**{f'order_count__{lookup}': value})
     
     class Meta:
         model = Customer
         fields = ['name', 'email', 'phone']
 
 
-class ProductFilter(django_filters.FilterSet):
+class ProductFilter(CRMFilterSet):
     """Filter for Product model."""
     
-    name = django_filters.CharFilter(lookup_expr='icontains')
+    # Indexed like the customer prefix filters (migration 0005)
+    name_istartswith = django_filters.CharFilter(field_name='name', lookup_expr='istartswith')
+    name = django_filters.CharFilter(lookup_expr='icontains', help_text=CONTAINS_HELP)
     price_gte = django_filters.NumberFilter(field_name='price', lookup_expr='gte')
     price_lte = django_filters.NumberFilter(field_name='price', lookup_expr='lte')
     stock_gte = django_filters.NumberFilter(field_name='stock', lookup_expr='gte')
@@ -38,10 +132,11 @@ class ProductFilter(django_filters.FilterSet):
     
     class Meta:
         model = Product
-        fields = ['name', 'price', 'stock']
+        # Only declared filters; exact price/stock lookups are covered by the ranges
+        fields = ['name']
 
 
-class OrderFilter(django_filters.FilterSet):
+class OrderFilter(CRMFilterSet):
     """Filter for Order model."""
     
     total_amount_gte = django_filters.NumberFilter(field_name='total_amount', lookup_expr='gte')
@@ -51,8 +146,22 @@ class OrderFilter(django_filters.FilterSet):
     order_date_lte = django_filters.DateFilter(field_name='order_date', lookup_expr='lte')
     
     customer_name = django_filters.CharFilter(field_name='customer__name', lookup_expr='icontains')
-    product_name = django_filters.CharFilter(field_name='products__name', lookup_expr='icontains')
+    product_name = django_filters.CharFilter(method='filter_product_name')
+    status = django_filters.ChoiceFilter(choices=STATUS_CHOICES)
+    
+    min_product_count = django_filters.NumberFilter(method='filter_by_product_count')
+    max_product_count = django_filters.NumberFilter(method='filter_by_product_count')
+    
+    def filter_product_name(self, queryset, name, value):
+        """Custom filter for orders containing a matching product."""
+        return queryset.filter(order_has_product_named(value)) if value else queryset
+    
+    def filter_by_product_count(self, queryset, name, value):
+        """Custom filter for orders by number of products."""
+        lookup = 'gte' if name.startswith('min_') else 'lte'
+        return annotate_product_count(queryset).filter(**{f'product_count__{lookup}': value})
     
     class Meta:
         model = Order
-        fields = ['total_amount', 'order_date']
\ No newline at end of file
+        # Only declared filters; exact amount/datetime lookups are covered by the ranges
+        fields = ['status']
\ No newline at end of file
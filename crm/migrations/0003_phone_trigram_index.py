@@ -0,0 +1,32 @@
+from django.db import migrations
+
+# The phone icontains filters get the same PostgreSQL trigram index as the
+# name and email searches (see 0002_trigram_indexes).
+INDEX_NAME = 'crm_customer_phone_trgm'
+
+
+def create_phone_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+        f'ON crm_customer USING gin (UPPER(phone) gin_trgm_ops)'
+    )
+
+
+def drop_phone_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0002_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_phone_trigram_index, drop_phone_trigram_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-14 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0003_phone_trigram_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'total_amount'], name='order_status_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status__in', ['delivered', 'shipped'])), fields=['total_amount'], name='order_revenue_amount_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# Case-insensitive indexes for the *_istartswith filters. No plain b-tree
+# index matches how Django compiles istartswith, so each backend gets one on
+# the expression it actually compares:
+#   PostgreSQL: UPPER(col::text) LIKE UPPER('term%'), served by an expression
+#               index with text_pattern_ops (LIKE prefix scans need a pattern
+#               opclass outside the C collation).
+#   SQLite:     col LIKE 'term%' (case-insensitive), served by an index using
+#               the NOCASE collation.
+# Other backends are skipped.
+ISTARTSWITH_INDEXES = [
+    ('crm_customer_name_istartswith', 'crm_customer', 'name'),
+    ('crm_customer_email_istartswith', 'crm_customer', 'email'),
+    ('crm_product_name_istartswith', 'crm_product', 'name'),
+]
+
+INDEX_EXPRESSIONS = {
+    'postgresql': '(UPPER({column}::text) text_pattern_ops)',
+    'sqlite': '{column} COLLATE NOCASE',
+}
+
+
+def create_istartswith_indexes(apps, schema_editor):
+    expression = INDEX_EXPRESSIONS.get(schema_editor.connection.vendor)
+    if expression is None:
+        return
+    for index_name, table, column in ISTARTSWITH_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} '
+            f'ON {table} ({expression.format(column=column)})'
+        )
+
+
+def drop_istartswith_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in INDEX_EXPRESSIONS:
+        return
+    for index_name, _table, _column in ISTARTSWITH_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0004_order_revenue_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_istartswith_indexes, drop_istartswith_indexes),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Prefix index for the phone_pattern filters (phone__startswith). The 0003
+# trigram index is on UPPER(phone) and does not match a plain prefix match:
+#   PostgreSQL: phone::text LIKE 'term%', served by a varchar_pattern_ops
+#               index (as Django creates for db_index CharFields).
+#   SQLite:     phone LIKE 'term%'; SQLite's LIKE is case-insensitive, so
+#               the index uses the NOCASE collation as in 0005.
+# Other backends are skipped.
+INDEX_NAME = 'crm_customer_phone_startswith'
+
+INDEX_EXPRESSIONS = {
+    'postgresql': 'phone varchar_pattern_ops',
+    'sqlite': 'phone COLLATE NOCASE',
+}
+
+
+def create_phone_prefix_index(apps, schema_editor):
+    expression = INDEX_EXPRESSIONS.get(schema_editor.connection.vendor)
+    if expression is None:
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} ON crm_customer ({expression})'
+    )
+
+
+def drop_phone_prefix_index(apps, schema_editor):
+    if schema_editor.connection.vendor not in INDEX_EXPRESSIONS:
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0005_istartswith_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_phone_prefix_index, drop_phone_prefix_index),
+    ]
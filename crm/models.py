@@ -2,6 +2,19 @@
 # Create your models here.
 from django.db import models
 import uuid
+from decimal import Decimal
+
+# Order status values, shared with OrderFilter
+STATUS_CHOICES = (
+    ('pending', 'Pending'),
+    ('processing', 'Processing'),
+    ('shipped', 'Shipped'),
+    ('delivered', 'Delivered'),
+    ('cancelled', 'Cancelled'),
+)
+
+# Statuses whose orders count towards revenue
+REVENUE_STATUSES = ['delivered', 'shipped']
 
 class Customer(models.Model):
     """Customer model for CRM system."""
@@ -32,6 +45,11 @@ class Product(models.Model):
     def __str__(self):
         return f"{self.name} - ${self.price}"
 
+    @property
+    def in_stock(self):
+        """Whether at least one unit is available."""
+        return self.stock > 0
+
     class Meta:
         ordering = ['-created_at']
 
@@ -45,13 +63,7 @@ class Order(models.Model):
     total_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     status = models.CharField(
         max_length=20,
-        choices=[
-            ('pending', 'Pending'),
-            ('processing', 'Processing'),
-            ('shipped', 'Shipped'),
-            ('delivered', 'Delivered'),
-            ('cancelled', 'Cancelled'),
-        ],
+        choices=STATUS_CHOICES,
         default='pending'
     )
     created_at = models.DateTimeField(auto_now_add=True)
@@ -62,16 +74,27 @@ class Order(models.Model):
 
     def calculate_total(self):
         """Calculate total amount from products."""
-        return sum(product.price for product in self.products.all())
+        total = self.products.aggregate(total=models.Sum('price'))['total']
+        return total or Decimal('0')
 
     def save(self, *args, **kwargs):
         """Override save to calculate total amount."""
-        # Call the parent save first to get the ID
+        # A new order has no products linked yet, so it keeps the total it was
+        # created with; existing orders are recalculated in the same UPDATE
+        update_fields = kwargs.get('update_fields')
+        if not self._state.adding and (update_fields is None or 'total_amount' in update_fields):
+            self.total_amount = self.calculate_total()
         super().save(*args, **kwargs)
-        # Calculate and update total amount
-        self.total_amount = self.calculate_total()
-        # Save again with updated total
-        super().save(update_fields=['total_amount'])
 
     class Meta:
-        ordering = ['-order_date']
\ No newline at end of file
+        ordering = ['-order_date']
+        indexes = [
+            # Serve the status filters and the revenue Sum from the index alone
+            models.Index(fields=['status', 'total_amount'], name='order_status_amount_idx'),
+            # Only the orders counted as revenue (see Query.resolve_total_revenue)
+            models.Index(
+                fields=['total_amount'],
+                name='order_revenue_amount_idx',
+                condition=models.Q(status__in=REVENUE_STATUSES),
+            ),
+        ]
\ No newline at end of file
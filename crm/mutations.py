@@ -1,22 +1,677 @@
 import graphene
-from graphene_django import DjangoObjectType
-from django.db import transaction
+from graphql import GraphQLError, StringValueNode, Undefined
+from django.db import IntegrityError, transaction
+from django.db.models import F
 import re
+from itertools import islice
 from decimal import Decimal
 from .models import Customer, Product, Order
+from .stats import (
+    CUSTOMER_COUNT_KEY, PRODUCT_COUNT_KEY, ORDER_COUNT_KEY, TOTAL_REVENUE_KEY,
+    invalidate_stats,
+)
 
-# ... (Copy all your mutation classes from the previous schema.py here)
-# I won't duplicate them here for brevity, but you should move:
-# CreateCustomer, BulkCreateCustomers, CreateProduct, CreateOrder,
-# UpdateCustomer, UpdateProductStock, CancelOrder, and Mutation class
+# Compiled once at import; validation runs for every row of a bulk import.
+# Both formats are pure ASCII, so re.ASCII skips Unicode class handling.
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', re.ASCII)
+_PHONE_INTL_RE = re.compile(r'^\+\d{1,3}[- ]?\d{6,14}$', re.ASCII)       # +1234567890
+_PHONE_LOCAL_RE = re.compile(r'^\d{3}[- ]?\d{3}[- ]?\d{4}$', re.ASCII)    # 123-456-7890
+_PHONE_PAREN_RE = re.compile(r'^\(\d{3}\) \d{3}-\d{4}$', re.ASCII)        # (123) 456-7890
+# The formats start with distinct characters; anything else can only be local
+_PHONE_RE_BY_FIRST_CHAR = {'+': _PHONE_INTL_RE, '(': _PHONE_PAREN_RE}
+
+# Rows per multi-row INSERT in bulk imports; the backend lowers this further
+# if it would exceed its bind-parameter limit (e.g. on SQLite)
+BULK_CREATE_BATCH_SIZE = 1000
+
+# ---------------------- SCALARS ----------------------
+
+def _validated(validate, value):
+    """Return value if validate accepts it, else raise its message as a GraphQL error."""
+    if value is Undefined:
+        return value
+    is_valid, error = validate(value)
+    if not is_valid:
+        raise GraphQLError(error)
+    return value
+
+
+class EmailScalar(graphene.Scalar):
+    """Email address, validated while the request is parsed."""
+    
+    serialize = graphene.String.serialize
+    
+    @staticmethod
+    def parse_value(value):
+        if not isinstance(value, str):
+            raise GraphQLError("Invalid email format")
+        return _validated(ValidationUtils.validate_email, value)
+    
+    @staticmethod
+    def parse_literal(node, _variables=None):
+        if isinstance(node, StringValueNode):
+            return EmailScalar.parse_value(node.value)
+        return Undefined
+
+
+class PhoneScalar(graphene.Scalar):
+    """Phone number in one of the accepted formats, validated while the request is parsed."""
+    
+    serialize = graphene.String.serialize
+    
+    @staticmethod
+    def parse_value(value):
+        if not isinstance(value, str):
+            raise GraphQLError("Invalid phone format. Use +1234567890 or 123-456-7890")
+        return _validated(ValidationUtils.validate_phone, value)
+    
+    @staticmethod
+    def parse_literal(node, _variables=None):
+        if isinstance(node, StringValueNode):
+            return PhoneScalar.parse_value(node.value)
+        return Undefined
+
+
+class PositiveDecimalScalar(graphene.Scalar):
+    """Decimal greater than 0, validated while the request is parsed."""
+    
+    serialize = graphene.Decimal.serialize
+    
+    @staticmethod
+    def parse_value(value):
+        return _validated(ValidationUtils.validate_price, graphene.Decimal.parse_value(value))
+    
+    @staticmethod
+    def parse_literal(node, _variables=None):
+        return _validated(ValidationUtils.validate_price, graphene.Decimal.parse_literal(node))
+
+
+class NonNegativeIntScalar(graphene.Scalar):
+    """Integer of at least 0, validated while the request is parsed."""
+    
+    serialize = graphene.Int.serialize
+    
+    @staticmethod
+    def parse_value(value):
+        return _validated(ValidationUtils.validate_stock, graphene.Int.parse_value(value))
+    
+    @staticmethod
+    def parse_literal(node, _variables=None):
+        return _validated(ValidationUtils.validate_stock, graphene.Int.parse_literal(node))
+
+
+# ---------------------- INPUTS ----------------------
+
+class CustomerInput(graphene.InputObjectType):
+    name = graphene.String(required=True, description="Customer's full name")
+    email = EmailScalar(required=True, description="Unique email address")
+    phone = PhoneScalar(description="Phone number in international or local format")
+
+
+class BulkCustomerInput(graphene.InputObjectType):
+    customers = graphene.List(CustomerInput, required=True, description="List of customers to create")
+    return_customers = graphene.Boolean(
+        default_value=True,
+        description="Return the created customers; disable for large imports to get counts only"
+    )
+
+
+class ProductInput(graphene.InputObjectType):
+    name = graphene.String(required=True, description="Product name")
+    description = graphene.String(description="Product description")
+    price = PositiveDecimalScalar(required=True, description="Product price (positive decimal)")
+    stock = NonNegativeIntScalar(description="Initial stock quantity")
+
+
+class OrderInput(graphene.InputObjectType):
+    customer_id = graphene.ID(required=True, description="Existing customer ID")
+    product_ids = graphene.List(graphene.ID, required=True, description="List of existing product IDs")
+    status = graphene.String(description="Order status")
+
+
+class UpdateCustomerInput(graphene.InputObjectType):
+    """Input for updating customer information."""
+    id = graphene.ID(required=True, description="Customer ID")
+    name = graphene.String(description="Updated name")
+    phone = PhoneScalar(description="Updated phone number")
+
+
+class UpdateProductStockInput(graphene.InputObjectType):
+    """Input for updating product stock."""
+    id = graphene.ID(required=True, description="Product ID")
+    stock_change = graphene.Int(required=True, description="Change in stock (positive to add, negative to remove)")
+
+
+class CancelOrderInput(graphene.InputObjectType):
+    """Input for canceling an order."""
+    id = graphene.ID(required=True, description="Order ID")
+    reason = graphene.String(description="Cancellation reason")
+
+
+# ---------------------- RESPONSE TYPES ----------------------
+
+class MutationResponse(graphene.ObjectType):
+    """Base response type for mutations."""
+    success = graphene.Boolean(required=True)
+    message = graphene.String()
+    errors = graphene.List(graphene.String)
+
+
+class CustomerResponse(MutationResponse):
+    """Response type for customer mutations."""
+    customer = graphene.Field('crm.schema.CustomerNode')
+
+
+class BulkCustomerResponse(MutationResponse):
+    """Response type for bulk customer mutations."""
+    customers = graphene.List('crm.schema.CustomerNode')
+    created_count = graphene.Int()
+    failed_count = graphene.Int()
+
+
+class ProductResponse(MutationResponse):
+    """Response type for product mutations."""
+    product = graphene.Field('crm.schema.ProductNode')
+
+
+class OrderResponse(MutationResponse):
+    """Response type for order mutations."""
+    order = graphene.Field('crm.schema.OrderNode')
+
+
+# ---------------------- VALIDATION UTILITIES ----------------------
+
+class ValidationUtils:
+    """Utility class for input validation."""
+    
+    @staticmethod
+    def validate_email(email):
+        """Validate email format."""
+        return (True, None) if _EMAIL_RE.match(email) else (False, "Invalid email format")
+    
+    @staticmethod
+    def validate_phone(phone):
+        """Validate phone number format."""
+        if not phone:
+            return True, None
+        
+        # Multiple formats supported; only the one the first character allows is tried
+        pattern = _PHONE_RE_BY_FIRST_CHAR.get(phone[0], _PHONE_LOCAL_RE)
+        if pattern.match(phone):
+            return True, None
+        
+        return False, "Invalid phone format. Use +1234567890 or 123-456-7890"
+    
+    @staticmethod
+    def validate_price(price):
+        """Validate price is positive."""
+        if price <= Decimal('0'):
+            return False, "Price must be greater than 0"
+        return True, None
+    
+    @staticmethod
+    def validate_stock(stock):
+        """Validate stock is non-negative."""
+        if stock < 0:
+            return False, "Stock cannot be negative"
+        return True, None
+    
+    @staticmethod
+    def validate_name(name):
+        """Validate name is not empty."""
+        if not name or not name.strip():
+            return False, "Name cannot be empty"
+        return True, None
+
+
+# ---------------------- MUTATIONS ----------------------
+
+class CreateCustomer(graphene.Mutation):
+    """Mutation to create a single customer."""
+    
+    class Arguments:
+        input = CustomerInput(required=True)
+    
+    Output = CustomerResponse
+    
+    @staticmethod
+    def mutate(root, info, input):
+        try:
+            # Validate inputs; email and phone are checked by their scalars
+            is_valid, error = ValidationUtils.validate_name(input.name)
+            if not is_valid:
+                return CustomerResponse(success=False, message=error)
+            
+            # Create customer; the unique index on email rejects duplicates,
+            # so no existence check is queried first. bulk_create is a plain
+            # INSERT without save() and its signals, which nothing here uses.
+            try:
+                with transaction.atomic():
+                    customer = Customer.objects.bulk_create([Customer(
+                        name=input.name.strip(),
+                        email=input.email.lower(),
+                        phone=input.phone if input.phone else None
+                    )])[0]
+            except IntegrityError:
+                return CustomerResponse(
+                    success=False, 
+                    message=f"Email '{input.email}' already exists"
+                )
+            invalidate_stats(CUSTOMER_COUNT_KEY)
+            
+            return CustomerResponse(
+                success=True,
+                message="Customer created successfully",
+                customer=customer
+            )
+            
+        except Exception as e:
+            return CustomerResponse(
+                success=False,
+                message=f"Error creating customer: {str(e)}"
+            )
+
+
+def _stage_customers(rows, row_errors):
+    """Yield (index, input email, Customer) for each valid row of a bulk import.
+    
+    Invalid rows are recorded in row_errors under their index instead.
+    """
+    seen_emails = set()
+    for idx, customer_input in enumerate(rows):
+        # The list items are nullable, so a null entry is just an invalid row
+        if customer_input is None:
+            row_errors[idx] = "Customer data is required"
+            continue
+        
+        # Validate name; email and phone are checked by their scalars
+        is_valid, error_msg = ValidationUtils.validate_name(customer_input.name)
+        if not is_valid:
+            row_errors[idx] = error_msg
+            continue
+        
+        # Repeats within the input are caught here; only the first is inserted
+        email = customer_input.email.lower()
+        if email in seen_emails:
+            row_errors[idx] = f"Duplicate email '{customer_input.email}' in batch"
+            continue
+        seen_emails.add(email)
+        
+        yield idx, customer_input.email, Customer(
+            name=customer_input.name.strip(),
+            email=email,
+            phone=customer_input.phone if customer_input.phone else None
+        )
+
+
+class BulkCreateCustomers(graphene.Mutation):
+    """Mutation to create multiple customers in bulk."""
+    
+    class Arguments:
+        input = BulkCustomerInput(required=True)
+    
+    Output = BulkCustomerResponse
+    
+    @transaction.atomic
+    def mutate(root, info, input):
+        row_errors = {}
+        customers = []
+        created_count = 0
+        
+        # Validated rows are built, inserted and released one chunk at a time,
+        # so only BULK_CREATE_BATCH_SIZE Customer instances exist at once
+        # unless the caller asks for them back.
+        staged_rows = _stage_customers(input.customers, row_errors)
+        while True:
+            staged = list(islice(staged_rows, BULK_CREATE_BATCH_SIZE))
+            if not staged:
+                break
+            
+            # One multi-row INSERT per chunk. Rows whose email already exists
+            # in the table are skipped by the database (ON CONFLICT DO NOTHING /
+            # INSERT OR IGNORE), which also covers concurrent imports without a
+            # separate pre-check query.
+            candidates = [customer for _idx, _email, customer in staged]
+            Customer.objects.bulk_create(
+                candidates, batch_size=BULK_CREATE_BATCH_SIZE, ignore_conflicts=True
+            )
+            
+            # Primary keys are generated client-side, so the rows that made it
+            # in can be identified after the fact.
+            inserted = set(
+                Customer.objects.filter(pk__in=[c.pk for c in candidates]).values_list('pk', flat=True)
+            )
+            for idx, email, customer in staged:
+                if customer.pk in inserted:
+                    created_count += 1
+                    if input.return_customers:
+                        customers.append(customer)
+                else:
+                    row_errors[idx] = f"Email '{email}' already exists"
+        
+        errors = [f"Row {idx + 1}: {error}" for idx, error in sorted(row_errors.items())]
+        failed_count = len(errors)
+        if created_count:
+            invalidate_stats(CUSTOMER_COUNT_KEY)
+        
+        message = f"Created {created_count} customer(s), {failed_count} failed"
+        return BulkCustomerResponse(
+            success=created_count > 0,
+            message=message,
+            customers=customers if input.return_customers else None,
+            errors=errors if errors else None,
+            created_count=created_count,
+            failed_count=failed_count
+        )
+
+
+class CreateProduct(graphene.Mutation):
+    """Mutation to create a product."""
+    
+    class Arguments:
+        input = ProductInput(required=True)
+    
+    Output = ProductResponse
+    
+    @staticmethod
+    def mutate(root, info, input):
+        try:
+            # Validate name
+            is_valid, error = ValidationUtils.validate_name(input.name)
+            if not is_valid:
+                return ProductResponse(success=False, message=error)
+            
+            # Price and stock are checked by their scalars
+            stock = input.stock if input.stock is not None else 0
+            
+            # Create product with a plain INSERT, as in CreateCustomer
+            product = Product.objects.bulk_create([Product(
+                name=input.name.strip(),
+                description=input.description.strip() if input.description else "",
+                price=input.price,
+                stock=stock
+            )])[0]
+            invalidate_stats(PRODUCT_COUNT_KEY)
+            
+            return ProductResponse(
+                success=True,
+                message="Product created successfully",
+                product=product
+            )
+            
+        except Exception as e:
+            return ProductResponse(
+                success=False,
+                message=f"Error creating product: {str(e)}"
+            )
+
+
+class CreateOrder(graphene.Mutation):
+    """Mutation to create an order."""
+    
+    class Arguments:
+        input = OrderInput(required=True)
+    
+    Output = OrderResponse
+    
+    @staticmethod
+    def mutate(root, info, input):
+        try:
+            with transaction.atomic():
+                # Validate customer exists. The FK constraint is deferred to the
+                # outermost commit, which inside an enclosing transaction comes
+                # too late to report it here; an indexed EXISTS avoids loading
+                # the customer.
+                if not Customer.objects.filter(pk=input.customer_id).exists():
+                    return OrderResponse(
+                        success=False,
+                        message=f"Customer with ID '{input.customer_id}' not found"
+                    )
+                
+                # Validate at least one product
+                if not input.product_ids:
+                    return OrderResponse(
+                        success=False,
+                        message="At least one product is required"
+                    )
+                
+                # Fetch and lock all requested products in one query. Only the
+                # columns checked here are read, as plain rows rather than models.
+                # The query has no joins, so only product rows are locked.
+                requested_ids = {Product._meta.pk.to_python(pid) for pid in input.product_ids}
+                products = list(
+                    Product.objects.filter(id__in=requested_ids)
+                    .select_for_update()
+                    .values_list('id', 'name', 'price', 'stock', named=True)
+                )
+                
+                missing_ids = requested_ids - {product.id for product in products}
+                if missing_ids:
+                    missing = ', '.join(f"'{pid}'" for pid in sorted(map(str, missing_ids)))
+                    return OrderResponse(
+                        success=False,
+                        message=f"Product(s) with ID {missing} not found"
+                    )
+                
+                # Check stock availability
+                out_of_stock = [product.name for product in products if product.stock < 1]
+                if out_of_stock:
+                    return OrderResponse(
+                        success=False,
+                        message=f"Product '{out_of_stock[0]}' is out of stock"
+                    )
+                
+                total_amount = sum((product.price for product in products), Decimal('0'))
+                
+                # Create order, linking the customer by key
+                order = Order.objects.create(
+                    customer_id=input.customer_id,
+                    status=input.status if input.status else 'pending',
+                    total_amount=total_amount
+                )
+                
+                # Add products to order; a new order has no links to check, so
+                # this is a single multi-row INSERT into the through table
+                order.products.add(*requested_ids)
+                
+                # Update product stock with a single UPDATE. The stock guard keeps the
+                # decrement safe on backends that ignore select_for_update().
+                updated = Product.objects.filter(id__in=requested_ids, stock__gte=1).update(
+                    stock=F('stock') - 1
+                )
+                if updated != len(products):
+                    transaction.set_rollback(True)
+                    return OrderResponse(
+                        success=False,
+                        message="One or more products went out of stock, please retry"
+                    )
+                
+                invalidate_stats(ORDER_COUNT_KEY, TOTAL_REVENUE_KEY)
+                
+                return OrderResponse(
+                    success=True,
+                    message="Order created successfully",
+                    order=order
+                )
+        
+        except IntegrityError:
+            # The customer was deleted after the check above
+            return OrderResponse(
+                success=False,
+                message=f"Customer with ID '{input.customer_id}' not found"
+            )
+        
+        except Exception as e:
+            return OrderResponse(
+                success=False,
+                message=f"Error creating order: {str(e)}"
+            )
+
+
+# ---------------------- NEW ENHANCED MUTATIONS ----------------------
+
+class UpdateCustomer(graphene.Mutation):
+    """Mutation to update customer information."""
+    
+    class Arguments:
+        input = UpdateCustomerInput(required=True)
+    
+    Output = CustomerResponse
+    
+    @staticmethod
+    def mutate(root, info, input):
+        try:
+            # Get customer
+            try:
+                customer = Customer.objects.get(id=input.id)
+            except Customer.DoesNotExist:
+                return CustomerResponse(
+                    success=False,
+                    message=f"Customer with ID '{input.id}' not found"
+                )
+            
+            # Update fields if provided
+            if input.name:
+                is_valid, error = ValidationUtils.validate_name(input.name)
+                if not is_valid:
+                    return CustomerResponse(success=False, message=error)
+                customer.name = input.name.strip()
+            
+            if input.phone:
+                customer.phone = input.phone
+            
+            customer.save()
+            
+            return CustomerResponse(
+                success=True,
+                message="Customer updated successfully",
+                customer=customer
+            )
+            
+        except Exception as e:
+            return CustomerResponse(
+                success=False,
+                message=f"Error updating customer: {str(e)}"
+            )
+
+
+class UpdateProductStock(graphene.Mutation):
+    """Mutation to update product stock."""
+    
+    class Arguments:
+        input = UpdateProductStockInput(required=True)
+    
+    Output = ProductResponse
+    
+    @staticmethod
+    def mutate(root, info, input):
+        try:
+            # Get product
+            try:
+                product = Product.objects.get(id=input.id)
+            except Product.DoesNotExist:
+                return ProductResponse(
+                    success=False,
+                    message=f"Product with ID '{input.id}' not found"
+                )
+            
+            # Calculate new stock
+            new_stock = product.stock + input.stock_change
+            
+            # Validate new stock
+            if new_stock < 0:
+                return ProductResponse(
+                    success=False,
+                    message=f"Cannot reduce stock below 0. Current stock: {product.stock}"
+                )
+            
+            # Update stock
+            product.stock = new_stock
+            product.save(update_fields=['stock'])
+            
+            action = "added to" if input.stock_change > 0 else "removed from"
+            return ProductResponse(
+                success=True,
+                message=f"Stock {action} product. New stock: {new_stock}",
+                product=product
+            )
+            
+        except Exception as e:
+            return ProductResponse(
+                success=False,
+                message=f"Error updating product stock: {str(e)}"
+            )
+
+
+class CancelOrder(graphene.Mutation):
+    """Mutation to cancel an order."""
+    
+    class Arguments:
+        input = CancelOrderInput(required=True)
+    
+    Output = OrderResponse
+    
+    @transaction.atomic
+    def mutate(root, info, input):
+        try:
+            # Get and lock the order, so concurrent cancellations of the same
+            # order cannot both pass the status check and restock twice
+            try:
+                order = Order.objects.select_for_update().get(id=input.id)
+            except Order.DoesNotExist:
+                return OrderResponse(
+                    success=False,
+                    message=f"Order with ID '{input.id}' not found"
+                )
+            
+            # Check if order can be cancelled
+            if order.status == 'cancelled':
+                return OrderResponse(
+                    success=False,
+                    message="Order is already cancelled"
+                )
+            
+            if order.status == 'delivered':
+                return OrderResponse(
+                    success=False,
+                    message="Cannot cancel delivered orders"
+                )
+            
+            # Cancel order. A queryset update skips Order.save(), which
+            # would recalculate the total as well.
+            Order.objects.filter(pk=order.pk).update(status='cancelled')
+            order.status = 'cancelled'
+            
+            # Restock every product of the order with a single UPDATE
+            Product.objects.filter(orders=order).update(stock=F('stock') + 1)
+            invalidate_stats(TOTAL_REVENUE_KEY)
+            
+            reason_msg = f" Reason: {input.reason}" if input.reason else ""
+            return OrderResponse(
+                success=True,
+                message=f"Order cancelled successfully.{reason_msg}",
+                order=order
+            )
+            
+        except Exception as e:
+            return OrderResponse(
+                success=False,
+                message=f"Error cancelling order: {str(e)}"
+            )
+
+
+# ---------------------- MUTATIONS CLASS ----------------------
 
 class Mutation(graphene.ObjectType):
     """GraphQL mutations for CRM."""
+    
+    # Original mutations
     create_customer = CreateCustomer.Field()
     bulk_create_customers = BulkCreateCustomers.Field()
-    create_product = CreateProduct.Field() # type: ignore
+    create_product = CreateProduct.Field()
     create_order = CreateOrder.Field()
+    
+    # Enhanced mutations
     update_customer = UpdateCustomer.Field()
     update_product_stock = UpdateProductStock.Field()
     cancel_order = CancelOrder.Field()
-
@@ -1,768 +1,115 @@
-
-'''
 import graphene
-from graphene_django import DjangoObjectType
-from django.db import transaction, models
-import re
 from decimal import Decimal
-import uuid
-from datetime import datetime
-from .models import Customer, Product, Order
-
-# ---------------------- TYPES ----------------------
-
-class CustomerType(DjangoObjectType):
-    """Customer GraphQL type with additional computed fields."""
-    class Meta:
-        model = Customer
-        fields = '__all__'
-    
-    total_spent = graphene.Decimal()
-    order_count = graphene.Int()
-    
-    def resolve_total_spent(self, info):
-        """Calculate total amount spent by customer."""
-        total = self.orders.aggregate(total=models.Sum('total_amount'))['total']
-        return total or Decimal('0')
-    
-    def resolve_order_count(self, info):
-        """Count total orders by customer."""
-        return self.orders.count()
-
-
-class ProductType(DjangoObjectType):
-    """Product GraphQL type with additional fields."""
-    class Meta:
-        model = Product
-        fields = '__all__'
-    
-    in_stock = graphene.Boolean()
-    
-    def resolve_in_stock(self, info):
-        """Check if product is in stock."""
-        return self.stock > 0
-
-
-class OrderType(DjangoObjectType):
-    """Order GraphQL type with enhanced relationships."""
-    class Meta:
-        model = Order
-        fields = '__all__'
-    
-    product_count = graphene.Int()
-    formatted_date = graphene.String()
-    
-    def resolve_product_count(self, info):
-        """Count products in order."""
-        return self.products.count()
-    
-    def resolve_formatted_date(self, info):
-        """Return formatted order date."""
-        return self.order_date.strftime('%Y-%m-%d %H:%M:%S')
-
-
-# ---------------------- INPUTS ----------------------
-
-class CustomerInput(graphene.InputObjectType):
-    name = graphene.String(required=True, description="Customer's full name")
-    email = graphene.String(required=True, description="Unique email address")
-    phone = graphene.String(description="Phone number in international or local format")
-
-
-class BulkCustomerInput(graphene.InputObjectType):
-    customers = graphene.List(CustomerInput, required=True, description="List of customers to create")
-
-
-class ProductInput(graphene.InputObjectType):
-    name = graphene.String(required=True, description="Product name")
-    description = graphene.String(description="Product description")
-    price = graphene.Decimal(required=True, description="Product price (positive decimal)")
-    stock = graphene.Int(description="Initial stock quantity")
-
-
-class OrderInput(graphene.InputObjectType):
-    customer_id = graphene.ID(required=True, description="Existing customer ID")
-    product_ids = graphene.List(graphene.ID, required=True, description="List of existing product IDs")
-    status = graphene.String(description="Order status")
-
-
-class UpdateCustomerInput(graphene.InputObjectType):
-    """Input for updating customer information."""
-    id = graphene.ID(required=True, description="Customer ID")
-    name = graphene.String(description="Updated name")
-    phone = graphene.String(description="Updated phone number")
-
-
-class UpdateProductStockInput(graphene.InputObjectType):
-    """Input for updating product stock."""
-    id = graphene.ID(required=True, description="Product ID")
-    stock_change = graphene.Int(required=True, description="Change in stock (positive to add, negative to remove)")
-
-
-class CancelOrderInput(graphene.InputObjectType):
-    """Input for canceling an order."""
-    id = graphene.ID(required=True, description="Order ID")
-    reason = graphene.String(description="Cancellation reason")
-
-
-# ---------------------- RESPONSE TYPES ----------------------
-
-class MutationResponse(graphene.ObjectType):
-    """Base response type for mutations."""
-    success = graphene.Boolean(required=True)
-    message = graphene.String()
-    errors = graphene.List(graphene.String)
-
-
-class CustomerResponse(MutationResponse):
-    """Response type for customer mutations."""
-    customer = graphene.Field(CustomerType)
-
-
-class BulkCustomerResponse(MutationResponse):
-    """Response type for bulk customer mutations."""
-    customers = graphene.List(CustomerType)
-    created_count = graphene.Int()
-    failed_count = graphene.Int()
-
-
-class ProductResponse(MutationResponse):
-    """Response type for product mutations."""
-    product = graphene.Field(ProductType)
-
-
-class OrderResponse(MutationResponse):
-    """Response type for order mutations."""
-    order = graphene.Field(OrderType)
-
-
-# ---------------------- VALIDATION UTILITIES ----------------------
-
-class ValidationUtils:
-    """Utility class for input validation."""
-    
-    @staticmethod
-    def validate_email(email):
-        """Validate email format."""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(pattern, email):
-            return False, "Invalid email format"
-        return True, None
-    
-    @staticmethod
-    def validate_phone(phone):
-        """Validate phone number format."""
-        if not phone:
-            return True, None
-        
-        # Multiple formats supported
-        patterns = [
-            r'^\+\d{1,3}[- ]?\d{6,14}$',  # International: +1234567890
-            r'^\d{3}[- ]?\d{3}[- ]?\d{4}$',  # Local: 123-456-7890
-            r'^\(\d{3}\) \d{3}-\d{4}$',  # Local: (123) 456-7890
+from graphene_django import DjangoObjectType
+from graphene_django.filter import DjangoFilterConnectionField
+from graphene_django.utils import bypass_get_queryset
+from graphene import relay
+from graphene.utils.str_converters import to_snake_case
+from graphql import FieldNode, get_named_type
+import django_filters
+from django.db import models
+from .models import Customer, Product, Order, REVENUE_STATUSES
+from .filters import (
+    CustomerFilter, ProductFilter, OrderFilter,
+    annotate_order_count, annotate_product_count, annotate_total_spent,
+    order_has_product_named,
+)
+from .stats import (
+    CUSTOMER_COUNT_KEY, PRODUCT_COUNT_KEY, ORDER_COUNT_KEY, TOTAL_REVENUE_KEY,
+    cached_stat,
+)
+
+# Rows fetched per round-trip when streaming the non-paginated list queries
+LIST_CHUNK_SIZE = 2000
+
+# Model columns read by computed fields
+COMPUTED_FIELD_COLUMNS = {
+    'in_stock': ['stock'],
+    'formatted_date': ['order_date'],
+}
+
+# Queryset work each field needs, applied only when the field is selected
+CUSTOMER_OPTIMIZATIONS = {
+    'total_spent': {'annotate': annotate_total_spent},
+    'order_count': {'annotate': annotate_order_count},
+}
+ORDER_OPTIMIZATIONS = {
+    'customer': {'select_related': ['customer']},
+    'products': {'prefetch_related': ['products']},
+    'product_count': {'annotate': annotate_product_count},
+}
+
+# ---------------------- QUERY HELPERS ----------------------
+
+def requested_fields(info):
+    """Return snake_case names selected on the current field.
+    
+    For connection fields the names selected under edges { node } are
+    returned. Returns None when the selection uses fragments, since their
+    fields cannot be read without resolving the fragment definitions.
+    """
+    graphene_type = getattr(get_named_type(info.return_type), 'graphene_type', None)
+    is_connection = isinstance(graphene_type, type) and issubclass(graphene_type, relay.Connection)
+    
+    selection_sets = [field_node.selection_set for field_node in info.field_nodes]
+    for step in (('edges', 'node') if is_connection else ()):
+        selection_sets = [
+            selection.selection_set
+            for selection_set in selection_sets if selection_set is not None
+            for selection in selection_set.selections
+            if isinstance(selection, FieldNode) and selection.name.value == step
         ]
-        
-        for pattern in patterns:
-            if re.match(pattern, phone):
-                return True, None
-        
-        return False, "Invalid phone format. Use +1234567890 or 123-456-7890"
-    
-    @staticmethod
-    def validate_price(price):
-        """Validate price is positive."""
-        if price <= Decimal('0'):
-            return False, "Price must be greater than 0"
-        return True, None
-    
-    @staticmethod
-    def validate_stock(stock):
-        """Validate stock is non-negative."""
-        if stock < 0:
-            return False, "Stock cannot be negative"
-        return True, None
-    
-    @staticmethod
-    def validate_name(name):
-        """Validate name is not empty."""
-        if not name or not name.strip():
-            return False, "Name cannot be empty"
-        return True, None
-
-
-# ---------------------- MUTATIONS ----------------------
-
-class CreateCustomer(graphene.Mutation):
-    """Mutation to create a single customer."""
-    
-    class Arguments:
-        input = CustomerInput(required=True)
-    
-    Output = CustomerResponse
-    
-    @staticmethod
-    def mutate(root, info, input):
-        try:
-            # Validate inputs
-            is_valid, error = ValidationUtils.validate_name(input.name)
-            if not is_valid:
-                return CustomerResponse(success=False, message=error)
-            
-            is_valid, error = ValidationUtils.validate_email(input.email)
-            if not is_valid:
-                return CustomerResponse(success=False, message=error)
-            
-            if input.phone:
-                is_valid, error = ValidationUtils.validate_phone(input.phone)
-                if not is_valid:
-                    return CustomerResponse(success=False, message=error)
-            
-            # Check for duplicate email
-            if Customer.objects.filter(email=input.email).exists():
-                return CustomerResponse(
-                    success=False, 
-                    message=f"Email '{input.email}' already exists"
-                )
-            
-            # Create customer
-            customer = Customer(
-                name=input.name.strip(),
-                email=input.email.lower(),
-                phone=input.phone if input.phone else None
-            )
-            customer.save()
-            
-            return CustomerResponse(
-                success=True,
-                message="Customer created successfully",
-                customer=customer
-            )
-            
-        except Exception as e:
-            return CustomerResponse(
-                success=False,
-                message=f"Error creating customer: {str(e)}"
-            )
-
-
-class BulkCreateCustomers(graphene.Mutation):
-    """Mutation to create multiple customers in bulk."""
-    
-    class Arguments:
-        input = BulkCustomerInput(required=True)
-    
-    Output = BulkCustomerResponse
-    
-    @transaction.atomic
-    def mutate(root, info, input):
-        customers = []
-        errors = []
-        created_count = 0
-        failed_count = 0
-        
-        for idx, customer_input in enumerate(input.customers):
-            try:
-                # Validate name
-                is_valid, error_msg = ValidationUtils.validate_name(customer_input.name)
-                if not is_valid:
-                    errors.append(f"Row {idx + 1}: {error_msg}")
-                    failed_count += 1
-                    continue
-                
-                # Validate email
-                is_valid, error_msg = ValidationUtils.validate_email(customer_input.email)
-                if not is_valid:
-                    errors.append(f"Row {idx + 1}: {error_msg}")
-                    failed_count += 1
-                    continue
-                
-                # Validate phone if provided
-                if customer_input.phone:
-                    is_valid, error_msg = ValidationUtils.validate_phone(customer_input.phone)
-                    if not is_valid:
-                        errors.append(f"Row {idx + 1}: {error_msg}")
-                        failed_count += 1
-                        continue
-                
-                # Check for duplicate email
-                if Customer.objects.filter(email=customer_input.email.lower()).exists():
-                    errors.append(f"Row {idx + 1}: Email '{customer_input.email}' already exists")
-                    failed_count += 1
-                    continue
-                
-                # Create customer
-                customer = Customer(
-                    name=customer_input.name.strip(),
-                    email=customer_input.email.lower(),
-                    phone=customer_input.phone if customer_input.phone else None
-                )
-                customer.save()
-                
-                customers.append(customer)
-                created_count += 1
-                
-            except Exception as e:
-                errors.append(f"Row {idx + 1}: {str(e)}")
-                failed_count += 1
-        
-        message = f"Created {created_count} customer(s), {failed_count} failed"
-        return BulkCustomerResponse(
-            success=created_count > 0,
-            message=message,
-            customers=customers,
-            errors=errors if errors else None,
-            created_count=created_count,
-            failed_count=failed_count
-        )
-
-
-class CreateProduct(graphene.Mutation):
-    """Mutation to create a product."""
-    
-    class Arguments:
-        input = ProductInput(required=True)
     
-    Output = ProductResponse
-    
-    @staticmethod
-    def mutate(root, info, input):
-        try:
-            # Validate name
-            is_valid, error = ValidationUtils.validate_name(input.name)
-            if not is_valid:
-                return ProductResponse(success=False, message=error)
-            
-            # Validate price
-            is_valid, error = ValidationUtils.validate_price(input.price)
-            if not is_valid:
-                return ProductResponse(success=False, message=error)
-            
-            # Validate stock
-            stock = input.stock if input.stock is not None else 0
-            is_valid, error = ValidationUtils.validate_stock(stock)
-            if not is_valid:
-                return ProductResponse(success=False, message=error)
-            
-            # Create product
-            product = Product(
-                name=input.name.strip(),
-                description=input.description.strip() if input.description else "",
-                price=input.price,
-                stock=stock
-            )
-            product.save()
-            
-            return ProductResponse(
-                success=True,
-                message="Product created successfully",
-                product=product
-            )
-            
-        except Exception as e:
-            return ProductResponse(
-                success=False,
-                message=f"Error creating product: {str(e)}"
-            )
-
-
-class CreateOrder(graphene.Mutation):
-    """Mutation to create an order."""
-    
-    class Arguments:
-        input = OrderInput(required=True)
-    
-    Output = OrderResponse
-    
-    @transaction.atomic
-    def mutate(root, info, input):
-        try:
-            # Validate customer exists
-            try:
-                customer = Customer.objects.get(id=input.customer_id)
-            except Customer.DoesNotExist:
-                return OrderResponse(
-                    success=False,
-                    message=f"Customer with ID '{input.customer_id}' not found"
-                )
-            
-            # Validate at least one product
-            if not input.product_ids:
-                return OrderResponse(
-                    success=False,
-                    message="At least one product is required"
-                )
-            
-            # Get and validate products
-            products = []
-            total_amount = Decimal('0')
-            
-            for product_id in input.product_ids:
-                try:
-                    product = Product.objects.get(id=product_id)
-                    
-                    # Check stock availability
-                    if product.stock < 1:
-                        return OrderResponse(
-                            success=False,
-                            message=f"Product '{product.name}' is out of stock"
-                        )
-                    
-                    products.append(product)
-                    total_amount += product.price
-                    
-                except Product.DoesNotExist:
-                    return OrderResponse(
-                        success=False,
-                        message=f"Product with ID '{product_id}' not found"
-                    )
-            
-            # Create order
-            order = Order(
-                customer=customer,
-                status=input.status if input.status else 'pending',
-                total_amount=total_amount
-            )
-            order.save()
-            
-            # Add products to order
-            order.products.add(*products)
-            
-            # Update product stock
-            for product in products:
-                product.stock -= 1
-                product.save(update_fields=['stock'])
-            
-            # Refresh order to get calculated total
-            order.refresh_from_db()
-            
-            return OrderResponse(
-                success=True,
-                message="Order created successfully",
-                order=order
-            )
-            
-        except Exception as e:
-            return OrderResponse(
-                success=False,
-                message=f"Error creating order: {str(e)}"
-            )
-
-
-# ---------------------- NEW ENHANCED MUTATIONS ----------------------
-
-class UpdateCustomer(graphene.Mutation):
-    """Mutation to update customer information."""
-    
-    class Arguments:
-        input = UpdateCustomerInput(required=True)
-    
-    Output = CustomerResponse
-    
-    @staticmethod
-    def mutate(root, info, input):
-        try:
-            # Get customer
-            try:
-                customer = Customer.objects.get(id=input.id)
-            except Customer.DoesNotExist:
-                return CustomerResponse(
-                    success=False,
-                    message=f"Customer with ID '{input.id}' not found"
-                )
-            
-            # Update fields if provided
-            if input.name:
-                is_valid, error = ValidationUtils.validate_name(input.name)
-                if not is_valid:
-                    return CustomerResponse(success=False, message=error)
-                customer.name = input.name.strip()
-            
-            if input.phone:
-                is_valid, error = ValidationUtils.validate_phone(input.phone)
-                if not is_valid:
-                    return CustomerResponse(success=False, message=error)
-                customer.phone = input.phone
-            
-            customer.save()
-            
-            return CustomerResponse(
-                success=True,
-                message="Customer updated successfully",
-                customer=customer
-            )
-            
-        except Exception as e:
-            return CustomerResponse(
-                success=False,
-                message=f"Error updating customer: {str(e)}"
-            )
-
-
-class UpdateProductStock(graphene.Mutation):
-    """Mutation to update product stock."""
-    
-    class Arguments:
-        input = UpdateProductStockInput(required=True)
-    
-    Output = ProductResponse
-    
-    @staticmethod
-    def mutate(root, info, input):
-        try:
-            # Get product
-            try:
-                product = Product.objects.get(id=input.id)
-            except Product.DoesNotExist:
-                return ProductResponse(
-                    success=False,
-                    message=f"Product with ID '{input.id}' not found"
-                )
-            
-            # Calculate new stock
-            new_stock = product.stock + input.stock_change
-            
-            # Validate new stock
-            if new_stock < 0:
-                return ProductResponse(
-                    success=False,
-                    message=f"Cannot reduce stock below 0. Current stock: {product.stock}"
-                )
-            
-            # Update stock
-            product.stock = new_stock
-            product.save(update_fields=['stock'])
-            
-            action = "added to" if input.stock_change > 0 else "removed from"
-            return ProductResponse(
-                success=True,
-                message=f"Stock {action} product. New stock: {new_stock}",
-                product=product
-            )
-            
-        except Exception as e:
-            return ProductResponse(
-                success=False,
-                message=f"Error updating product stock: {str(e)}"
-            )
-
-
-class CancelOrder(graphene.Mutation):
-    """Mutation to cancel an order."""
-    
-    class Arguments:
-        input = CancelOrderInput(required=True)
-    
-    Output = OrderResponse
-    
-    @transaction.atomic
-    def mutate(root, info, input):
-        try:
-            # Get order
-            try:
-                order = Order.objects.get(id=input.id)
-            except Order.DoesNotExist:
-                return OrderResponse(
-                    success=False,
-                    message=f"Order with ID '{input.id}' not found"
-                )
-            
-            # Check if order can be cancelled
-            if order.status == 'cancelled':
-                return OrderResponse(
-                    success=False,
-                    message="Order is already cancelled"
-                )
-            
-            if order.status == 'delivered':
-                return OrderResponse(
-                    success=False,
-                    message="Cannot cancel delivered orders"
-                )
-            
-            # Cancel order
-            order.status = 'cancelled'
-            order.save(update_fields=['status'])
-            
-            # Restock products
-            for product in order.products.all():
-                product.stock += 1
-                product.save(update_fields=['stock'])
-            
-            reason_msg = f" Reason: {input.reason}" if input.reason else ""
-            return OrderResponse(
-                success=True,
-                message=f"Order cancelled successfully.{reason_msg}",
-                order=order
-            )
-            
-        except Exception as e:
-            return OrderResponse(
-                success=False,
-                message=f"Error cancelling order: {str(e)}"
-            )
-
-
-# ---------------------- QUERIES ----------------------
-
-class Query(graphene.ObjectType):
-    """GraphQL queries for CRM."""
-    
-    # Customer queries
-    customers = graphene.List(
-        CustomerType,
-        search=graphene.String(description="Search customers by name or email"),
-        email=graphene.String(description="Filter by exact email")
-    )
-    
-    customer = graphene.Field(
-        CustomerType,
-        id=graphene.ID(required=True, description="Customer ID")
-    )
-    
-    # Product queries
-    products = graphene.List(
-        ProductType,
-        search=graphene.String(description="Search products by name"),
-        min_price=graphene.Decimal(description="Minimum price filter"),
-        max_price=graphene.Decimal(description="Maximum price filter"),
-        in_stock=graphene.Boolean(description="Filter by stock availability")
-    )
-    
-    product = graphene.Field(
-        ProductType,
-        id=graphene.ID(required=True, description="Product ID")
-    )
-    
-    # Order queries
-    orders = graphene.List(
-        OrderType,
-        customer_id=graphene.ID(description="Filter by customer ID"),
-        status=graphene.String(description="Filter by order status"),
-        start_date=graphene.DateTime(description="Start date filter"),
-        end_date=graphene.DateTime(description="End date filter")
-    )
-    
-    order = graphene.Field(
-        OrderType,
-        id=graphene.ID(required=True, description="Order ID")
-    )
-    
-    # Statistics
-    customer_count = graphene.Int()
-    product_count = graphene.Int()
-    order_count = graphene.Int()
-    total_revenue = graphene.Decimal()
-    
-    # Resolvers
-    def resolve_customers(self, info, search=None, email=None):
-        queryset = Customer.objects.all()
-        
-        if search:
-            queryset = queryset.filter(
-                models.Q(name__icontains=search) |
-                models.Q(email__icontains=search)
-            )
-        
-        if email:
-            queryset = queryset.filter(email=email)
-        
+    names = set()
+    for selection_set in selection_sets:
+        if selection_set is None:
+            continue
+        for selection in selection_set.selections:
+            if not isinstance(selection, FieldNode):
+                return None
+            names.add(to_snake_case(selection.name.value))
+    return names
+
+
+def only_requested(queryset, info):
+    """Restrict the SELECT to the columns the GraphQL query asks for."""
+    fields = requested_fields(info)
+    if fields is None:
         return queryset
     
-    def resolve_customer(self, info, id):
-        try:
-            return Customer.objects.get(id=id)
-        except Customer.DoesNotExist:
-            return None
-    
-    def resolve_products(self, info, search=None, min_price=None, max_price=None, in_stock=None):
-        queryset = Product.objects.all()
-        
-        if search:
-            queryset = queryset.filter(name__icontains=search)
-        
-        if min_price is not None:
-            queryset = queryset.filter(price__gte=min_price)
-        
-        if max_price is not None:
-            queryset = queryset.filter(price__lte=max_price)
-        
-        if in_stock is not None:
-            if in_stock:
-                queryset = queryset.filter(stock__gt=0)
-            else:
-                queryset = queryset.filter(stock=0)
-        
-        return queryset
-    
-    def resolve_product(self, info, id):
-        try:
-            return Product.objects.get(id=id)
-        except Product.DoesNotExist:
-            return None
-    
-    def resolve_orders(self, info, customer_id=None, status=None, start_date=None, end_date=None):
-        queryset = Order.objects.all()
-        
-        if customer_id:
-            queryset = queryset.filter(customer_id=customer_id)
-        
-        if status:
-            queryset = queryset.filter(status=status)
-        
-        if start_date:
-            queryset = queryset.filter(order_date__gte=start_date)
-        
-        if end_date:
-            queryset = queryset.filter(order_date__lte=end_date)
-        
-        return queryset
-    
-    def resolve_order(self, info, id):
-        try:
-            return Order.objects.get(id=id)
-        except Order.DoesNotExist:
-            return None
-    
-    def resolve_customer_count(self, info):
-        return Customer.objects.count()
-    
-    def resolve_product_count(self, info):
-        return Product.objects.count()
-    
-    def resolve_order_count(self, info):
-        return Order.objects.count()
-    
-    def resolve_total_revenue(self, info):
-        total = Order.objects.filter(status__in=['delivered', 'shipped']).aggregate(
-            total=models.Sum('total_amount')
-        )['total']
-        return total or Decimal('0')
-
-
-# ---------------------- MUTATIONS CLASS ----------------------
-
-class Mutation(graphene.ObjectType):
-    """GraphQL mutations for CRM."""
-    
-    # Original mutations
-    create_customer = CreateCustomer.Field()
-    bulk_create_customers = BulkCreateCustomers.Field()
-    create_product = CreateProduct.Field()
-    create_order = CreateOrder.Field()
-    
-    # Enhanced mutations
-    update_customer = UpdateCustomer.Field()
-    update_product_stock = UpdateProductStock.Field()
-    cancel_order = CancelOrder.Field()
-'''
-    
-import graphene
-from graphene_django import DjangoObjectType, DjangoFilterConnectionField
-from graphene import relay
-import django_filters
-from django.db import models
-from .models import Customer, Product, Order
-from .filters import CustomerFilter, ProductFilter, OrderFilter
+    concrete = {field.name for field in queryset.model._meta.concrete_fields}
+    columns = fields & concrete
+    for name in fields:
+        columns.update(COMPUTED_FIELD_COLUMNS.get(name, []))
+    # Relations joined with select_related() cannot be deferred
+    if isinstance(queryset.query.select_related, dict):
+        columns.update(queryset.query.select_related)
+    # Nor can the FK a related manager (customer.orders) reads on every row
+    # to attach it to its parent; deferring it costs one query per row
+    columns.update(field.name for field in queryset._known_related_objects)
+    # only() always keeps the primary key
+    return queryset.only(*columns)
+
+
+def optimize(queryset, info, optimizations):
+    """Apply the joins and annotations of the requested fields, then only_requested().
+    
+    A small hand-written stand-in for graphene-django-optimizer, which is not
+    a dependency. optimizations maps a field name to the queryset work it needs:
+    'select_related' / 'prefetch_related' lists and an 'annotate' function.
+    Everything is applied when the selection cannot be read.
+    """
+    fields = requested_fields(info)
+    for name, needs in optimizations.items():
+        if fields is not None and name not in fields:
+            continue
+        if needs.get('select_related'):
+            queryset = queryset.select_related(*needs['select_related'])
+        if needs.get('prefetch_related'):
+            queryset = queryset.prefetch_related(*needs['prefetch_related'])
+        if needs.get('annotate'):
+            queryset = needs['annotate'](queryset)
+    return only_requested(queryset, info)
 
 # ---------------------- CONNECTION TYPES ----------------------
 
@@ -777,14 +124,24 @@ class CustomerNode(DjangoObjectType):
     total_spent = graphene.Decimal()
     order_count = graphene.Int()
     
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        """Compute the requested order totals in the customer query for connection/node lookups."""
+        return optimize(queryset.all(), info, CUSTOMER_OPTIMIZATIONS)
+    
     def resolve_total_spent(self, info):
         """Calculate total amount spent by customer."""
-        total = self.orders.aggregate(total=models.Sum('total_amount'))['total']
-        return total or 0
+        # Annotated by the list queries; instances from other paths aggregate here
+        total = getattr(self, 'total_spent', None)
+        if total is None:
+            total = self.orders.aggregate(total=models.Sum('total_amount'))['total']
+        # Decimal, not int: graphene's Decimal scalar rejects a plain 0
+        return total if total is not None else Decimal('0')
     
     def resolve_order_count(self, info):
         """Count total orders by customer."""
-        return self.orders.count()
+        order_count = getattr(self, 'order_count', None)
+        return order_count if order_count is not None else self.orders.count()
 
 
 class ProductNode(DjangoObjectType):
@@ -795,11 +152,8 @@ class ProductNode(DjangoObjectType):
         fields = '__all__'
         filterset_class = ProductFilter
     
+    # Read from Product.in_stock by the default attribute resolver
     in_stock = graphene.Boolean()
-    
-    def resolve_in_stock(self, info):
-        """Check if product is in stock."""
-        return self.stock > 0
 
 
 class OrderNode(DjangoObjectType):
@@ -813,13 +167,31 @@ class OrderNode(DjangoObjectType):
     product_count = graphene.Int()
     formatted_date = graphene.String()
     
+    @classmethod
+    def get_queryset(cls, queryset, info):
+        """Join, prefetch and count the requested relations for connection/node lookups."""
+        return optimize(queryset.all(), info, ORDER_OPTIMIZATIONS)
+    
     def resolve_product_count(self, info):
         """Count products in order."""
-        return self.products.count()
+        # Annotated by the list queries; instances from other paths count here
+        product_count = getattr(self, 'product_count', None)
+        return product_count if product_count is not None else self.products.count()
+    
+    @bypass_get_queryset
+    def resolve_customer(self, info):
+        """Return the customer joined by select_related.
+
+        Without the bypass graphene-django refetches each customer through
+        CustomerNode.get_queryset, one query per order.
+        """
+        return self.customer
     
     def resolve_formatted_date(self, info):
         """Return formatted order date."""
-        return self.order_date.strftime('%Y-%m-%d %H:%M:%S')
+        # Same output as strftime('%Y-%m-%d %H:%M:%S') without the format parsing;
+        # the offset isoformat() appends for aware datetimes is dropped
+        return self.order_date.replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')
 
 # ---------------------- INPUT TYPES FOR FILTERING ----------------------
 
@@ -955,33 +327,40 @@ class Query(graphene.ObjectType):
     
     # Resolvers for simple queries
     def resolve_customers(self, info, filter=None, order_by=None):
-        queryset = Customer.objects.all()
+        queryset = optimize(Customer.objects.all(), info, CUSTOMER_OPTIMIZATIONS)
         
         if filter:
             # Apply filters manually
             if filter.get('name'):
                 queryset = queryset.filter(name__icontains=filter['name'])
+            if filter.get('name_exact'):
+                queryset = queryset.filter(name=filter['name_exact'])
             if filter.get('email'):
                 queryset = queryset.filter(email__icontains=filter['email'])
+            if filter.get('email_exact'):
+                # Emails are stored lowercased, so this is a unique-index lookup
+                queryset = queryset.filter(email=filter['email_exact'].lower())
             if filter.get('phone'):
                 queryset = queryset.filter(phone__icontains=filter['phone'])
             if filter.get('phone_pattern'):
-                import re
-                pattern = re.escape(filter['phone_pattern'])
-                queryset = queryset.filter(phone__regex=f'^{pattern}')
+                queryset = queryset.filter(phone__startswith=filter['phone_pattern'])
             if filter.get('created_at_gte'):
                 queryset = queryset.filter(created_at__gte=filter['created_at_gte'])
             if filter.get('created_at_lte'):
                 queryset = queryset.filter(created_at__lte=filter['created_at_lte'])
+            if filter.get('order_count_gte') is not None:
+                queryset = annotate_order_count(queryset).filter(order_count__gte=filter['order_count_gte'])
+            if filter.get('order_count_lte') is not None:
+                queryset = annotate_order_count(queryset).filter(order_count__lte=filter['order_count_lte'])
         
         # Apply ordering
         if order_by:
             queryset = queryset.order_by(order_by)
         
-        return queryset
+        return queryset.iterator(chunk_size=LIST_CHUNK_SIZE)
     
     def resolve_products(self, info, filter=None, order_by=None):
-        queryset = Product.objects.all()
+        queryset = optimize(Product.objects.all(), info, {})
         
         if filter:
             # Apply filters manually
@@ -1007,10 +386,10 @@ class Query(graphene.ObjectType):
         if order_by:
             queryset = queryset.order_by(order_by)
         
-        return queryset
+        return queryset.iterator(chunk_size=LIST_CHUNK_SIZE)
     
     def resolve_orders(self, info, filter=None, order_by=None):
-        queryset = Order.objects.all()
+        queryset = optimize(Order.objects.all(), info, ORDER_OPTIMIZATIONS)
         
         if filter:
             # Apply filters manually
@@ -1025,18 +404,19 @@ class Query(graphene.ObjectType):
             if filter.get('customer_name'):
                 queryset = queryset.filter(customer__name__icontains=filter['customer_name'])
             if filter.get('product_name'):
-                queryset = queryset.filter(products__name__icontains=filter['product_name'])
+                queryset = queryset.filter(order_has_product_named(filter['product_name']))
             if filter.get('status'):
                 queryset = queryset.filter(status=filter['status'])
-        
-        # Remove duplicates from M2M relationships
-        queryset = queryset.distinct()
+            if filter.get('min_product_count') is not None:
+                queryset = annotate_product_count(queryset).filter(product_count__gte=filter['min_product_count'])
+            if filter.get('max_product_count') is not None:
+                queryset = annotate_product_count(queryset).filter(product_count__lte=filter['max_product_count'])
         
         # Apply ordering
         if order_by:
             queryset = queryset.order_by(order_by)
         
-        return queryset
+        return queryset.iterator(chunk_size=LIST_CHUNK_SIZE)
     
     # Resolvers for statistics
     def resolve_customer_count(self, info, filter=None):
@@ -1049,9 +429,10 @@ class Query(graphene.ObjectType):
             if filter.get('email'):
                 queryset = queryset.filter(email__icontains=filter['email'])
             if filter.get('phone_pattern'):
-                import re
-                pattern = re.escape(filter['phone_pattern'])
-                queryset = queryset.filter(phone__regex=f'^{pattern}')
+                queryset = queryset.filter(phone__startswith=filter['phone_pattern'])
+        else:
+            # Unfiltered totals are shared by every dashboard request
+            return cached_stat(CUSTOMER_COUNT_KEY, queryset.count)
         
         return queryset.count()
     
@@ -1065,6 +446,8 @@ class Query(graphene.ObjectType):
                 queryset = queryset.filter(price__gte=filter['price_gte'])
             if filter.get('price_lte') is not None:
                 queryset = queryset.filter(price__lte=filter['price_lte'])
+        else:
+            return cached_stat(PRODUCT_COUNT_KEY, queryset.count)
         
         return queryset.count()
     
@@ -1076,11 +459,13 @@ class Query(graphene.ObjectType):
                 queryset = queryset.filter(total_amount__gte=filter['total_amount_gte'])
             if filter.get('status'):
                 queryset = queryset.filter(status=filter['status'])
+        else:
+            return cached_stat(ORDER_COUNT_KEY, queryset.count)
         
         return queryset.count()
     
     def resolve_total_revenue(self, info, filter=None):
-        queryset = Order.objects.filter(status__in=['delivered', 'shipped'])
+        queryset = Order.objects.filter(status__in=REVENUE_STATUSES)
         
         if filter:
             if filter.get('total_amount_gte') is not None:
@@ -1092,8 +477,11 @@ class Query(graphene.ObjectType):
             if filter.get('order_date_lte'):
                 queryset = queryset.filter(order_date__lte=filter['order_date_lte'])
         
-        total = queryset.aggregate(total=models.Sum('total_amount'))['total']
-        return total or 0
+        def revenue():
+            total = queryset.aggregate(total=models.Sum('total_amount'))['total']
+            return total if total is not None else Decimal('0')
+        
+        return revenue() if filter else cached_stat(TOTAL_REVENUE_KEY, revenue)
 
 
 # Keep your existing Mutation class (from previous tasks)
@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.db import transaction
+
+# Seconds an unfiltered dashboard statistic is served from the cache
+STATS_CACHE_TTL = 30
+
+CUSTOMER_COUNT_KEY = 'crm:customer_count'
+PRODUCT_COUNT_KEY = 'crm:product_count'
+ORDER_COUNT_KEY = 'crm:order_count'
+TOTAL_REVENUE_KEY = 'crm:total_revenue'
+
+
+def cached_stat(key, compute):
+    """Return the cached value for key, computing and caching it on a miss."""
+    return cache.get_or_set(key, compute, STATS_CACHE_TTL)
+
+
+def invalidate_stats(*keys):
+    """Drop the cached statistics once the current transaction commits.
+
+    Outside a transaction the keys are dropped immediately.
+    """
+    transaction.on_commit(lambda: cache.delete_many(keys))
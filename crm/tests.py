@@ -1,3 +1,567 @@
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from alx_backend_graphql_crm.schema import schema
+from .models import Customer, Order, Product
+
+
+def execute(query, **variables):
+    """Run query against the project schema."""
+    return schema.execute(query, variable_values=variables)
+
+
+BULK_CREATE_CUSTOMERS = '''
+mutation($customers: [CustomerInput]!, $returnCustomers: Boolean) {
+  bulkCreateCustomers(input: {customers: $customers, returnCustomers: $returnCustomers}) {
+    success
+    errors
+    createdCount
+    failedCount
+    customers { email }
+  }
+}
+'''
+
+
+class BulkCreateCustomersTests(TestCase):
+    """Partial success of bulk imports: valid rows are created, the rest reported."""
+
+    def test_duplicate_and_invalid_rows_are_reported_per_row(self):
+        Customer.objects.create(name='Taken', email='taken@example.com')
+
+        result = execute(BULK_CREATE_CUSTOMERS, customers=[
+            {'name': 'Alice', 'email': 'alice@example.com'},
+            {'name': 'Alice Again', 'email': 'ALICE@example.com'},
+            {'name': 'Taken Again', 'email': 'taken@example.com'},
+            {'name': '  ', 'email': 'blank@example.com'},
+            {'name': 'Bob', 'email': 'bob@example.com', 'phone': '123-456-7890'},
+        ])
+
+        self.assertIsNone(result.errors)
+        payload = result.data['bulkCreateCustomers']
+        self.assertTrue(payload['success'])
+        self.assertEqual(payload['createdCount'], 2)
+        self.assertEqual(payload['failedCount'], 3)
+        self.assertEqual(payload['errors'], [
+            "Row 2: Duplicate email 'ALICE@example.com' in batch",
+            "Row 3: Email 'taken@example.com' already exists",
+            "Row 4: Name cannot be empty",
+        ])
+        self.assertEqual(
+            [customer['email'] for customer in payload['customers']],
+            ['alice@example.com', 'bob@example.com'],
+        )
+        self.assertEqual(Customer.objects.count(), 3)
+
+    def test_all_rows_failing_is_not_a_success(self):
+        Customer.objects.create(name='Taken', email='taken@example.com')
+
+        result = execute(BULK_CREATE_CUSTOMERS, customers=[
+            {'name': 'Taken Again', 'email': 'taken@example.com'},
+        ])
+
+        payload = result.data['bulkCreateCustomers']
+        self.assertFalse(payload['success'])
+        self.assertEqual(payload['createdCount'], 0)
+        self.assertEqual(payload['customers'], [])
+
+    def test_null_rows_are_reported_per_row(self):
+        result = execute(BULK_CREATE_CUSTOMERS, customers=[
+            {'name': 'Alice', 'email': 'alice@example.com'},
+            None,
+            {'name': 'Bob', 'email': 'bob@example.com'},
+        ])
+
+        self.assertIsNone(result.errors)
+        payload = result.data['bulkCreateCustomers']
+        self.assertEqual(payload['createdCount'], 2)
+        self.assertEqual(payload['errors'], ["Row 2: Customer data is required"])
+
+    @mock.patch('crm.mutations.BULK_CREATE_BATCH_SIZE', 2)
+    def test_rows_are_numbered_across_insert_chunks(self):
+        Customer.objects.create(name='Taken', email='taken@example.com')
+
+        result = execute(BULK_CREATE_CUSTOMERS, customers=[
+            {'name': 'A', 'email': 'a@example.com'},
+            {'name': 'B', 'email': 'b@example.com'},
+            {'name': 'C', 'email': 'a@example.com'},
+            {'name': 'D', 'email': 'd@example.com'},
+            {'name': 'E', 'email': 'taken@example.com'},
+        ])
+
+        payload = result.data['bulkCreateCustomers']
+        self.assertEqual(payload['createdCount'], 3)
+        self.assertEqual(payload['errors'], [
+            "Row 3: Duplicate email 'a@example.com' in batch",
+            "Row 5: Email 'taken@example.com' already exists",
+        ])
+        self.assertEqual(
+            [customer['email'] for customer in payload['customers']],
+            ['a@example.com', 'b@example.com', 'd@example.com'],
+        )
+
+    def test_return_customers_disabled_returns_counts_only(self):
+        result = execute(
+            BULK_CREATE_CUSTOMERS,
+            customers=[{'name': 'Alice', 'email': 'alice@example.com'}],
+            returnCustomers=False,
+        )
+
+        payload = result.data['bulkCreateCustomers']
+        self.assertEqual(payload['createdCount'], 1)
+        self.assertIsNone(payload['customers'])
+        self.assertTrue(Customer.objects.filter(email='alice@example.com').exists())
+
+
+CREATE_CUSTOMER = '''
+mutation($input: CustomerInput!) {
+  createCustomer(input: $input) { success customer { email phone } }
+}
+'''
+
+CREATE_PRODUCT = '''
+mutation($input: ProductInput!) {
+  createProduct(input: $input) { success product { price stock } }
+}
+'''
+
+
+class InputScalarTests(TestCase):
+    """Email, phone, price and stock are rejected while the request is parsed."""
+
+    def assertRejected(self, result, message):
+        self.assertIsNone(result.data)
+        self.assertEqual(len(result.errors), 1)
+        self.assertIn(message, result.errors[0].message)
+
+    def test_valid_customer_input_is_accepted(self):
+        result = execute(CREATE_CUSTOMER, input={
+            'name': 'Alice', 'email': 'alice@example.com', 'phone': '+1234567890',
+        })
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(
+            result.data['createCustomer']['customer'],
+            {'email': 'alice@example.com', 'phone': '+1234567890'},
+        )
+
+    def test_invalid_email_variable(self):
+        result = execute(CREATE_CUSTOMER, input={'name': 'Alice', 'email': 'not-an-email'})
+
+        self.assertRejected(result, "Invalid email format")
+        self.assertFalse(Customer.objects.exists())
+
+    def test_invalid_email_literal(self):
+        result = schema.execute(
+            'mutation { createCustomer(input: {name: "Alice", email: "nope"}) { success } }'
+        )
+
+        self.assertRejected(result, "Invalid email format")
+        self.assertFalse(Customer.objects.exists())
+
+    def test_invalid_phone(self):
+        result = execute(CREATE_CUSTOMER, input={
+            'name': 'Alice', 'email': 'alice@example.com', 'phone': '12',
+        })
+
+        self.assertRejected(result, "Invalid phone format. Use +1234567890 or 123-456-7890")
+
+    def test_non_positive_price(self):
+        result = execute(CREATE_PRODUCT, input={'name': 'Laptop', 'price': '0', 'stock': 1})
+
+        self.assertRejected(result, "Price must be greater than 0")
+        self.assertFalse(Product.objects.exists())
+
+    def test_negative_stock(self):
+        result = execute(CREATE_PRODUCT, input={'name': 'Laptop', 'price': '9.99', 'stock': -1})
+
+        self.assertRejected(result, "Stock cannot be negative")
+        self.assertFalse(Product.objects.exists())
+
+
+CREATE_ORDER = '''
+mutation($customerId: ID!, $productIds: [ID]!) {
+  createOrder(input: {customerId: $customerId, productIds: $productIds}) {
+    success
+    message
+    order { totalAmount customer { email } }
+  }
+}
+'''
+
+
+class CreateOrderTests(TestCase):
+    """CreateOrder error mapping; TestCase's transaction encloses every mutation."""
+
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        self.laptop = Product.objects.create(name='Laptop', price='999.99', stock=2)
+        self.mouse = Product.objects.create(name='Mouse', price='19.99', stock=1)
+
+    def create_order(self, customer_id, *products):
+        result = execute(
+            CREATE_ORDER,
+            customerId=str(customer_id),
+            productIds=[str(product.pk) for product in products],
+        )
+        self.assertIsNone(result.errors)
+        return result.data['createOrder']
+
+    def test_creates_order_and_takes_stock(self):
+        payload = self.create_order(self.customer.pk, self.laptop, self.mouse)
+
+        self.assertTrue(payload['success'])
+        self.assertEqual(payload['order']['totalAmount'], '1019.98')
+        self.assertEqual(payload['order']['customer']['email'], 'alice@example.com')
+        self.laptop.refresh_from_db()
+        self.mouse.refresh_from_db()
+        self.assertEqual((self.laptop.stock, self.mouse.stock), (1, 0))
+
+    def test_unknown_customer_is_reported(self):
+        unknown_id = uuid.uuid4()
+
+        payload = self.create_order(unknown_id, self.laptop)
+
+        self.assertFalse(payload['success'])
+        self.assertEqual(payload['message'], f"Customer with ID '{unknown_id}' not found")
+        self.assertFalse(Order.objects.exists())
+        self.laptop.refresh_from_db()
+        self.assertEqual(self.laptop.stock, 2)
+
+    def test_unknown_product_is_reported(self):
+        unknown_id = uuid.uuid4()
+
+        result = execute(
+            CREATE_ORDER,
+            customerId=str(self.customer.pk),
+            productIds=[str(self.laptop.pk), str(unknown_id)],
+        )
+
+        payload = result.data['createOrder']
+        self.assertFalse(payload['success'])
+        self.assertEqual(payload['message'], f"Product(s) with ID '{unknown_id}' not found")
+        self.assertFalse(Order.objects.exists())
+
+    def test_out_of_stock_product_is_rejected(self):
+        Product.objects.filter(pk=self.mouse.pk).update(stock=0)
+
+        payload = self.create_order(self.customer.pk, self.laptop, self.mouse)
+
+        self.assertFalse(payload['success'])
+        self.assertEqual(payload['message'], "Product 'Mouse' is out of stock")
+        self.assertFalse(Order.objects.exists())
+        self.laptop.refresh_from_db()
+        self.assertEqual(self.laptop.stock, 2)
+
+
+CANCEL_ORDER = '''
+mutation($id: ID!) {
+  cancelOrder(input: {id: $id}) { success message order { status } }
+}
+'''
+
+
+class CancelOrderTests(TestCase):
+    """Cancelling restocks the order's products once and removes its revenue."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        self.laptop = Product.objects.create(name='Laptop', price='999.99', stock=1)
+        self.mouse = Product.objects.create(name='Mouse', price='19.99', stock=0)
+        self.monitor = Product.objects.create(name='Monitor', price='199.99', stock=5)
+        self.order = Order.objects.create(
+            customer=customer, total_amount='1019.98', status='shipped'
+        )
+        self.order.products.add(self.laptop, self.mouse)
+
+    def cancel(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = execute(CANCEL_ORDER, id=str(self.order.pk))
+        self.assertIsNone(result.errors)
+        return result.data['cancelOrder']
+
+    def stock(self):
+        return {
+            product.name: product.stock
+            for product in Product.objects.filter(
+                pk__in=[self.laptop.pk, self.mouse.pk, self.monitor.pk]
+            )
+        }
+
+    def total_revenue(self):
+        result = schema.execute('{ totalRevenue }')
+        self.assertIsNone(result.errors)
+        return Decimal(result.data['totalRevenue'])
+
+    def test_cancel_restocks_each_product_once(self):
+        payload = self.cancel()
+
+        self.assertTrue(payload['success'])
+        self.assertEqual(payload['order'], {'status': 'CANCELLED'})
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, 'cancelled')
+        self.assertEqual(self.order.total_amount, Decimal('1019.98'))
+        self.assertEqual(self.stock(), {'Laptop': 2, 'Mouse': 1, 'Monitor': 5})
+
+    def test_cancelling_twice_does_not_restock_again(self):
+        self.cancel()
+
+        payload = self.cancel()
+
+        self.assertFalse(payload['success'])
+        self.assertEqual(payload['message'], "Order is already cancelled")
+        self.assertEqual(self.stock(), {'Laptop': 2, 'Mouse': 1, 'Monitor': 5})
+
+    def test_cancel_removes_revenue(self):
+        self.assertEqual(self.total_revenue(), Decimal('1019.98'))
+
+        self.cancel()
+
+        self.assertEqual(self.total_revenue(), Decimal('0'))
+
+    def test_delivered_orders_cannot_be_cancelled(self):
+        Order.objects.filter(pk=self.order.pk).update(status='delivered')
+
+        payload = self.cancel()
+
+        self.assertFalse(payload['success'])
+        self.assertEqual(payload['message'], "Cannot cancel delivered orders")
+        self.assertEqual(self.stock(), {'Laptop': 1, 'Mouse': 0, 'Monitor': 5})
+
+
+class CustomerTotalsTests(TestCase):
+    """totalSpent is a Decimal on every path, including customers without orders."""
+
+    def setUp(self):
+        self.customer = Customer.objects.create(name='Alice', email='alice@example.com')
+
+    def test_total_spent_without_orders(self):
+        result = schema.execute('''
+        {
+          customers { totalSpent orderCount }
+          allCustomers { edges { node { totalSpent orderCount } } }
+        }
+        ''')
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['customers'], [{'totalSpent': '0', 'orderCount': 0}])
+        self.assertEqual(
+            result.data['allCustomers']['edges'],
+            [{'node': {'totalSpent': '0', 'orderCount': 0}}],
+        )
+
+    def test_total_spent_in_create_customer_payload(self):
+        result = schema.execute(
+            'mutation { createCustomer(input: {name: "Bob", email: "bob@example.com"}) '
+            '{ customer { totalSpent } } }'
+        )
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['createCustomer']['customer'], {'totalSpent': '0'})
+
+    def test_total_spent_sums_orders(self):
+        Order.objects.create(customer=self.customer, total_amount='10.50')
+        Order.objects.create(customer=self.customer, total_amount='4.25')
+
+        result = schema.execute('{ customers { totalSpent orderCount } }')
+
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data['customers'], [{'totalSpent': '14.75', 'orderCount': 2}])
+
+
+class TotalRevenueTests(TestCase):
+    """totalRevenue counts shipped and delivered orders, as a Decimal even when empty."""
+
+    def setUp(self):
+        # Unfiltered statistics are cached across requests
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.customer = Customer.objects.create(name='Alice', email='alice@example.com')
+
+    def total_revenue(self, query='{ totalRevenue }'):
+        result = schema.execute(query)
+        self.assertIsNone(result.errors)
+        return result.data['totalRevenue']
+
+    def test_empty_database(self):
+        self.assertEqual(self.total_revenue(), '0')
+        # The cached value is served as a Decimal too
+        self.assertEqual(self.total_revenue(), '0')
+
+    def test_only_cancelled_orders(self):
+        Order.objects.create(customer=self.customer, total_amount='20.00', status='cancelled')
+
+        self.assertEqual(self.total_revenue(), '0')
+
+    def test_filtered_without_matches(self):
+        Order.objects.create(customer=self.customer, total_amount='20.00', status='delivered')
+
+        revenue = self.total_revenue('{ totalRevenue(filter: {totalAmountGte: "50"}) }')
+
+        self.assertEqual(revenue, '0')
+
+    def test_sums_revenue_statuses(self):
+        for status, amount in [('delivered', '20.00'), ('shipped', '5.50'), ('pending', '100.00')]:
+            Order.objects.create(customer=self.customer, total_amount=amount, status=status)
+
+        # Compared as Decimal: the backend decides the scale of the SUM
+        self.assertEqual(Decimal(self.total_revenue()), Decimal('25.50'))
+
+
+class QueryCountTests(TestCase):
+    """The list and connection resolvers read only what the query selects."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = Customer.objects.create(name='Alice', email='alice@example.com')
+        cls.bob = Customer.objects.create(name='Bob', email='bob@example.com')
+        for customer in (cls.alice, cls.bob):
+            Order.objects.create(customer=customer, total_amount='10.00')
+            Order.objects.create(customer=customer, total_amount='5.00')
+
+    def assertQueries(self, count, query):
+        with self.assertNumQueries(count) as ctx:
+            result = schema.execute(query)
+        self.assertIsNone(result.errors)
+        return result.data, [q['sql'] for q in ctx.captured_queries]
+
+    def test_list_selects_requested_columns(self):
+        data, queries = self.assertQueries(1, '{ customers { name } }')
+
+        self.assertEqual(len(data['customers']), 2)
+        self.assertNotIn('"email"', queries[0])
+
+    def test_connection_selects_requested_columns(self):
+        # COUNT for the connection, then the page
+        data, queries = self.assertQueries(2, '{ allCustomers { edges { node { name } } } }')
+
+        self.assertEqual(len(data['allCustomers']['edges']), 2)
+        self.assertNotIn('"email"', queries[1])
+
+    def test_select_related_customer(self):
+        data, _queries = self.assertQueries(
+            1, '{ orders { totalAmount customer { name } } }'
+        )
+        self.assertEqual(len(data['orders']), 4)
+
+        data, _queries = self.assertQueries(
+            2, '{ allOrders { edges { node { totalAmount customer { name } } } } }'
+        )
+        self.assertEqual(len(data['allOrders']['edges']), 4)
+
+    def test_nested_connection_keeps_parent_key(self):
+        # COUNT and page for the customers, then COUNT and page per customer;
+        # no per-order refetch of the deferred customer_id
+        data, _queries = self.assertQueries(
+            6, '{ allCustomers { edges { node { orders { edges { node { id totalAmount } } } } } } }'
+        )
+
+        for edge in data['allCustomers']['edges']:
+            self.assertEqual(len(edge['node']['orders']['edges']), 2)
+
+    def test_nested_connection_under_list(self):
+        # The customers, then COUNT and page per customer
+        data, _queries = self.assertQueries(
+            5, '{ customers { name orders { edges { node { id status } } } } }'
+        )
+
+        for customer in data['customers']:
+            self.assertEqual(len(customer['orders']['edges']), 2)
+
+    def test_nested_connection_with_annotations(self):
+        # orderCount/totalSpent and productCount are annotated, not counted per row
+        data, _queries = self.assertQueries(6, '''
+        {
+          allCustomers {
+            edges { node { orderCount totalSpent orders { edges { node { id productCount } } } } }
+          }
+        }
+        ''')
+
+        for edge in data['allCustomers']['edges']:
+            self.assertEqual(edge['node']['orderCount'], 2)
+            self.assertEqual(Decimal(edge['node']['totalSpent']), Decimal('15.00'))
+            self.assertEqual(
+                [order['node']['productCount'] for order in edge['node']['orders']['edges']],
+                [0, 0],
+            )
+
+
+class StatsInvalidationTests(TestCase):
+    """Mutations drop the cached statistics they change once they commit."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.customer = Customer.objects.create(name='Alice', email='alice@example.com')
+        self.laptop = Product.objects.create(name='Laptop', price='10.00', stock=5)
+
+    def stats(self):
+        result = schema.execute('{ customerCount productCount orderCount totalRevenue }')
+        self.assertIsNone(result.errors)
+        data = result.data
+        return (
+            data['customerCount'], data['productCount'], data['orderCount'],
+            Decimal(data['totalRevenue']),
+        )
+
+    def mutate(self, query, **variables):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = execute(query, **variables)
+        self.assertIsNone(result.errors)
+        return result.data
+
+    def test_stats_are_cached(self):
+        self.assertEqual(self.stats(), (1, 1, 0, Decimal('0')))
+
+        # Writes outside the mutations do not invalidate
+        Customer.objects.create(name='Bob', email='bob@example.com')
+
+        self.assertEqual(self.stats(), (1, 1, 0, Decimal('0')))
+
+    def test_customer_mutations_invalidate_customer_count(self):
+        self.assertEqual(self.stats()[0], 1)
+
+        self.mutate(CREATE_CUSTOMER, input={'name': 'Bob', 'email': 'bob@example.com'})
+        self.assertEqual(self.stats()[0], 2)
+
+        self.mutate(BULK_CREATE_CUSTOMERS, customers=[
+            {'name': 'Carol', 'email': 'carol@example.com'},
+            {'name': 'Dave', 'email': 'dave@example.com'},
+        ])
+        self.assertEqual(self.stats()[0], 4)
+
+    def test_create_product_invalidates_product_count(self):
+        self.assertEqual(self.stats()[1], 1)
+
+        self.mutate(CREATE_PRODUCT, input={'name': 'Mouse', 'price': '5.00', 'stock': 1})
+
+        self.assertEqual(self.stats()[1], 2)
+
+    def test_order_mutations_invalidate_order_stats(self):
+        self.assertEqual(self.stats(), (1, 1, 0, Decimal('0')))
+
+        data = self.mutate(
+            '''
+            mutation($input: OrderInput!) {
+              createOrder(input: $input) { success order { id } }
+            }
+            ''',
+            input={
+                'customerId': str(self.customer.pk),
+                'productIds': [str(self.laptop.pk)],
+                'status': 'shipped',
+            },
+        )
+        self.assertTrue(data['createOrder']['success'])
+        self.assertEqual(self.stats(), (1, 1, 1, Decimal('10.00')))
+
+        order = Order.objects.get()
+        self.mutate(CANCEL_ORDER, id=str(order.pk))
+        self.assertEqual(self.stats(), (1, 1, 1, Decimal('0')))
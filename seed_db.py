@@ -2,129 +2,325 @@
 """
 Database seeder for CRM system.
 Run with: python seed_db.py
+(SEED_VERBOSE=0 python seed_db.py skips the per-row output;
+see python seed_db.py --help for --fresh-load and --parallel)
 """
+import argparse
+import csv
+import io
 import os
 import sys
 import django
-from decimal import Decimal
 import random
-from datetime import datetime, timedelta
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 
-# Setup Django
+# Setup Django; run directly, the seeder loads only the apps it needs
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if __name__ == "__main__":
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings_seed')
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_backend_graphql_crm.settings')
 django.setup()
 
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Case, F, IntegerField, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from crm.models import Customer, Product, Order
 
+# Rows per INSERT statement in the bulk inserts below; keeps each statement's
+# bind-parameter count bounded as the seed data grows
+SEED_BATCH_SIZE = 50
+
+# Above this many rows, PostgreSQL loads customers and products with COPY
+# rather than multi-row INSERTs
+SEED_COPY_THRESHOLD = 1000
+
+# Statuses drawn at random for seeded orders (none start cancelled)
+SEED_STATUSES = ('pending', 'processing', 'shipped', 'delivered')
+
+# Per-row output; set SEED_VERBOSE=0 to print only the phase summaries
+VERBOSE = os.environ.get('SEED_VERBOSE', '1') != '0'
+
+# Customers and products; also loadable on their own with `manage.py loaddata seed`
+SEED_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crm', 'fixtures', 'seed.json')
+
+# Orders as parallel lists: the customer and the products of order i, by
+# position among the fixture's customers / products
+ORDER_CUSTOMER_IDX = [0, 1, 2, 3, 4, 0, 1]
+ORDER_PRODUCT_IDX = [
+    [0, 1, 2],
+    [3, 4],
+    [5, 6, 7],
+    [0, 3],
+    [1, 4, 5, 6],
+    [7],
+    [2, 3, 4],
+]
+
+def load_seed_fixture():
+    """Return the fixture's objects, unsaved, grouped by model in file order.
+
+    Only the deserializer is reused: loaddata saves one object at a time,
+    while the create_* functions insert them in bulk.
+    """
+    objects = defaultdict(list)
+    with open(SEED_FIXTURE) as fixture:
+        for deserialized in serializers.deserialize('json', fixture):
+            objects[type(deserialized.object)].append(deserialized.object)
+    return objects
+
+def copy_rows(model, objs):
+    """Load objs into the model's table with PostgreSQL's COPY FROM STDIN.
+
+    Values go through the fields' pre_save / get_db_prep_save as bulk_create
+    would, so defaults and auto_now timestamps are still filled in.
+    """
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for obj in objs:
+        values = (field.get_db_prep_save(field.pre_save(obj, True), connection) for field in fields)
+        writer.writerow(r'\N' if value is None else value for value in values)
+    
+    quote = connection.ops.quote_name
+    sql = (
+        f"COPY {quote(model._meta.db_table)} "
+        f"({', '.join(quote(field.column) for field in fields)}) "
+        r"FROM STDIN WITH (FORMAT csv, NULL '\N')"
+    )
+    with connection.cursor() as cursor:
+        if hasattr(cursor, 'copy'):
+            # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+        else:
+            # psycopg2
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+    
+    # Mark the objects saved, as bulk_create does
+    for obj in objs:
+        obj._state.adding = False
+        obj._state.db = connection.alias
+    return objs
+
+def insert_rows(model, objs):
+    """Insert objs with COPY for large PostgreSQL loads, bulk_create otherwise."""
+    if connection.vendor == 'postgresql' and len(objs) > SEED_COPY_THRESHOLD:
+        return copy_rows(model, objs)
+    return model.objects.bulk_create(objs, batch_size=SEED_BATCH_SIZE)
+
+def report_rows(lines):
+    """Write the per-row messages of a phase in one write, unless SEED_VERBOSE=0."""
+    if VERBOSE:
+        sys.stdout.write("".join(f"{line}\n" for line in lines))
+
 def clear_database():
     """Clear existing data."""
     print("Clearing existing data...")
-    Order.objects.all().delete()
-    Product.objects.all().delete()
-    Customer.objects.all().delete()
+    # Emptied with the backend's flush SQL (a single TRUNCATE on PostgreSQL,
+    # DELETE FROM per table elsewhere) rather than ORM deletes, which load every
+    # row to cascade and send delete signals the seeder has no use for
+    tables = [
+        Order.products.through._meta.db_table,
+        Order._meta.db_table,
+        Product._meta.db_table,
+        Customer._meta.db_table,
+    ]
+    connection.ops.execute_sql_flush(
+        connection.ops.sql_flush(no_style(), tables, allow_cascade=True)
+    )
     print("Database cleared.")
 
-def create_customers():
-    """Create sample customers."""
+def _order_index_names():
+    """Names of the indexes currently present on the order table."""
+    with connection.cursor() as cursor:
+        return set(connection.introspection.get_constraints(cursor, Order._meta.db_table))
+
+def drop_order_indexes():
+    """Drop the secondary indexes declared in Order.Meta before a fresh load.
+
+    Indexes already missing (e.g. after an interrupted run) are skipped.
+    """
+    print("Dropping order indexes...")
+    present = _order_index_names()
+    with connection.schema_editor() as schema_editor:
+        for index in Order._meta.indexes:
+            if index.name in present:
+                schema_editor.remove_index(Order, index)
+
+def rebuild_order_indexes():
+    """Recreate whichever Order.Meta indexes are missing.
+
+    Prints nothing, so a closed stdout cannot interrupt it halfway.
+    """
+    present = _order_index_names()
+    with connection.schema_editor() as schema_editor:
+        for index in Order._meta.indexes:
+            if index.name not in present:
+                schema_editor.add_index(Order, index)
+
+def create_customers(customers):
+    """Create the given (unsaved) sample customers."""
     print("Creating customers...")
     
-    customers_data = [
-        {"name": "Alice Johnson", "email": "alice@example.com", "phone": "+1234567890"},
-        {"name": "Bob Smith", "email": "bob@example.com", "phone": "123-456-7890"},
-        {"name": "Carol Davis", "email": "carol@example.com", "phone": "+447123456789"},
-        {"name": "David Wilson", "email": "david@example.com", "phone": "555-123-4567"},
-        {"name": "Eva Brown", "email": "eva@example.com", "phone": "+33612345678"},
-    ]
+    # Multi-row INSERTs (or COPY) instead of one per customer
+    customers = insert_rows(Customer, customers)
     
-    customers = []
-    for data in customers_data:
-        customer = Customer.objects.create(**data)
-        customers.append(customer)
-        print(f"Created customer: {customer.name} ({customer.email})")
+    report_rows(f"Created customer: {customer.name} ({customer.email})" for customer in customers)
     
     return customers
 
-def create_products():
-    """Create sample products."""
+def create_products(products):
+    """Create the given (unsaved) sample products."""
     print("Creating products...")
     
-    products_data = [
-        {"name": "Laptop", "description": "High-performance laptop", "price": Decimal("999.99"), "stock": 50},
-        {"name": "Smartphone", "description": "Latest smartphone model", "price": Decimal("699.99"), "stock": 100},
-        {"name": "Tablet", "description": "10-inch tablet", "price": Decimal("399.99"), "stock": 75},
-        {"name": "Headphones", "description": "Wireless noise-cancelling headphones", "price": Decimal("199.99"), "stock": 150},
-        {"name": "Smart Watch", "description": "Fitness tracking smartwatch", "price": Decimal("249.99"), "stock": 80},
-        {"name": "Keyboard", "description": "Mechanical keyboard", "price": Decimal("129.99"), "stock": 60},
-        {"name": "Mouse", "description": "Wireless gaming mouse", "price": Decimal("79.99"), "stock": 120},
-        {"name": "Monitor", "description": "27-inch 4K monitor", "price": Decimal("449.99"), "stock": 40},
-    ]
+    # Products have no foreign keys, so they can all be inserted up front
+    products = insert_rows(Product, products)
     
-    products = []
-    for data in products_data:
-        product = Product.objects.create(**data)
-        products.append(product)
-        print(f"Created product: {product.name} - ${product.price}")
+    report_rows(f"Created product: {product.name} - ${product.price}" for product in products)
     
     return products
 
+def _in_worker_transaction(create, objs):
+    """Run create(objs) in its own transaction on the worker thread's connection."""
+    try:
+        with transaction.atomic():
+            return create(objs)
+    finally:
+        # The connection belongs to this thread; close it before the pool exits
+        connections.close_all()
+
+def create_catalog_parallel(fixture):
+    """Create customers and products concurrently, on separate connections.
+
+    Neither depends on the other, so their inserts can overlap; each commits
+    on its own before the orders are created.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        customers = executor.submit(_in_worker_transaction, create_customers, fixture[Customer])
+        products = executor.submit(_in_worker_transaction, create_products, fixture[Product])
+        return customers.result(), products.result()
+
 def create_orders(customers, products):
     """Create sample orders."""
     print("Creating orders...")
     
-    orders_data = [
-        {"customer": customers[0], "products": [products[0], products[1], products[2]]},
-        {"customer": customers[1], "products": [products[3], products[4]]},
-        {"customer": customers[2], "products": [products[5], products[6], products[7]]},
-        {"customer": customers[3], "products": [products[0], products[3]]},
-        {"customer": customers[4], "products": [products[1], products[4], products[5], products[6]]},
-        {"customer": customers[0], "products": [products[7]]},
-        {"customer": customers[1], "products": [products[2], products[3], products[4]]},
-    ]
+    # Resolve the positions to the created rows
+    order_customers = [customers[idx] for idx in ORDER_CUSTOMER_IDX]
+    order_products = [[products[idx] for idx in idxs] for idxs in ORDER_PRODUCT_IDX]
+    
+    # Price lookup built once for all order totals
+    prices = {product.id: product.price for product in products}
+    
+    # Draw every order's status and age (in days) up front
+    statuses = random.choices(SEED_STATUSES, k=len(order_customers))
+    day_offsets = random.choices(range(31), k=len(order_customers))
+    
+    # Set order date to be in the past for some orders, all relative to one
+    # aware timestamp
+    now = timezone.now()
+    order_dates = [now - timedelta(days=days_ago) for days_ago in day_offsets]
     
     orders = []
-    for i, data in enumerate(orders_data):
-        # Set order date to be in the past for some orders
-        order_date = datetime.now() - timedelta(days=random.randint(0, 30))
-        
-        # Create order
-        order = Order.objects.create(
-            customer=data["customer"],
-            order_date=order_date,
-            status=random.choice(['pending', 'processing', 'shipped', 'delivered'])
-        )
-        
-        # Add products to order
-        order.products.add(*data["products"])
-        
-        # Calculate and save total
-        order.total_amount = sum(p.price for p in data["products"])
-        order.save()
-        
-        # Update product stock
-        for product in data["products"]:
-            if product.stock > 0:
-                product.stock -= 1
-                product.save()
-        
-        orders.append(order)
-        print(f"Created order #{i+1} for {order.customer.name}: ${order.total_amount}")
+    for customer, lines, status in zip(order_customers, order_products, statuses):
+        # Totals are known up front, so no save() is needed after linking products
+        orders.append(Order(
+            customer=customer,
+            status=status,
+            total_amount=sum(prices[p.id] for p in lines)
+        ))
+    
+    # Insert all orders together, complete with their totals
+    orders = Order.objects.bulk_create(orders, batch_size=SEED_BATCH_SIZE)
+    
+    # order_date is auto_now_add, which overrides any value on insert; the
+    # backdated dates are applied afterwards in one UPDATE
+    for order, order_date in zip(orders, order_dates):
+        order.order_date = order_date
+    Order.objects.bulk_update(orders, ['order_date'], batch_size=SEED_BATCH_SIZE)
+    
+    # Name the customer from the seed data, never through a lazy order.customer lookup
+    report_rows(
+        f"Created order #{i+1} for {customer.name}: ${order.total_amount}"
+        for i, (order, customer) in enumerate(zip(orders, order_customers))
+    )
+    
+    # Link every order to its products with one multi-row INSERT into the
+    # through table instead of an add() per order
+    through = Order.products.through
+    through.objects.bulk_create(
+        [
+            through(order_id=order.id, product_id=product.id)
+            for order, lines in zip(orders, order_products)
+            for product in lines
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    
+    # Take one unit of stock per order line in a single UPDATE, never going
+    # below zero (as the per-order "if stock > 0" decrement did)
+    ordered = Counter(product.id for lines in order_products for product in lines)
+    Product.objects.filter(id__in=ordered).update(stock=Case(
+        *[
+            When(id=product_id, then=Greatest(F('stock') - count, 0))
+            for product_id, count in ordered.items()
+        ],
+        default=F('stock'),
+        output_field=IntegerField(),
+    ))
     
     return orders
 
-def main():
-    """Main seeding function."""
+def main(fresh_load=False, parallel=False):
+    """Main seeding function.
+
+    With fresh_load, Order's secondary indexes are built once over the loaded
+    rows instead of being updated on every insert. With parallel, customers
+    and products are loaded concurrently, at the cost of the single
+    transaction: a failed run can leave partially seeded data.
+    """
     print("=" * 50)
     print("Starting database seeding...")
     print("=" * 50)
     
-    # Clear existing data
-    clear_database()
+    # Deserialized once, for both the customer and product loads
+    fixture = load_seed_fixture()
+    
+    # Schema changes stay outside the transaction below (SQLite's schema
+    # editor refuses to run inside one); missing indexes are recreated even
+    # if the run fails
+    try:
+        if fresh_load:
+            drop_order_indexes()
+        
+        if parallel:
+            # Worker threads get their own connections, so every phase
+            # commits separately
+            with transaction.atomic():
+                clear_database()
+            customers, products = create_catalog_parallel(fixture)
+            with transaction.atomic():
+                orders = create_orders(customers, products)
+        else:
+            # Clear and recreate the data in one transaction: a single commit
+            # at the end, and a failed run leaves the previous data in place
+            with transaction.atomic():
+                clear_database()
+                
+                customers = create_customers(fixture[Customer])
+                products = create_products(fixture[Product])
+                orders = create_orders(customers, products)
+    finally:
+        if fresh_load:
+            rebuild_order_indexes()
     
-    # Create data
-    customers = create_customers()
-    products = create_products()
-    orders = create_orders(customers, products)
+    if fresh_load:
+        print("Order indexes rebuilt.")
     
     # Print summary
     print("=" * 50)
@@ -186,4 +382,14 @@ def main():
     """)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Seed the CRM database.")
+    parser.add_argument(
+        '--fresh-load', action='store_true',
+        help="drop Order's secondary indexes during the load and rebuild them afterwards",
+    )
+    parser.add_argument(
+        '--parallel', action='store_true',
+        help="load customers and products concurrently; phases commit separately",
+    )
+    args = parser.parse_args()
+    main(fresh_load=args.fresh_load, parallel=args.parallel)
\ No newline at end of file